@@ -0,0 +1,102 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator
+
+from ai.chains.prompts import EVALUATOR_PROMPT
+from ai.parsers import RecallPrecisionOutput
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def recall_precision_schema() -> dict:
+    schema = RecallPrecisionOutput.model_json_schema()
+    schema["additionalProperties"] = False
+    schema["required"] = list(schema["properties"])
+    return schema
+
+
+def judge_request(custom_id: str, ground_truth: str, system_response: str, model: str | None = None) -> dict:
+    body = {
+        "model": model or os.getenv("EVALUATOR_MODEL", "o4-mini"),
+        "messages": [{
+            "role": "user",
+            "content": EVALUATOR_PROMPT.format(ground_truth=ground_truth, system_response=system_response),
+        }],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": "RecallPrecisionOutput", "schema": recall_precision_schema(), "strict": True},
+        },
+    }
+    effort = os.getenv("EVALUATOR_REASONING_EFFORT", "medium")
+    if effort:
+        body["reasoning_effort"] = effort
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def parse_judge_response(line: dict) -> dict | None:
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        return None
+    choices = response.get("body", {}).get("choices") or []
+    if not choices or not choices[0].get("message", {}).get("content"):
+        return None
+    return RecallPrecisionOutput.model_validate_json(choices[0]["message"]["content"]).model_dump()
+
+
+class BatchClient(ABC):
+
+    @abstractmethod
+    def submit(self, path: Path, metadata: dict | None = None) -> str: ...
+
+    @abstractmethod
+    def status(self, batch_id: str) -> dict: ...
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Iterator[dict]: ...
+
+
+class OpenAIBatchClient(BatchClient):
+
+    def __init__(self, base_url: str | None = None, api_key: str | None = None):
+        from openai import OpenAI
+        self.client = OpenAI(
+            base_url=base_url or os.getenv("EVALUATOR_BASE_URL") or None,
+            api_key=api_key or os.getenv("OPENAI_API_KEY") or "not-needed",
+        )
+
+    def submit(self, path: Path, metadata: dict | None = None) -> str:
+        with open(path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata=metadata,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> dict:
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "id": batch.id,
+            "status": batch.status,
+            "total": counts.total if counts else 0,
+            "completed": counts.completed if counts else 0,
+            "failed": counts.failed if counts else 0,
+            "output_file_id": batch.output_file_id,
+            "error_file_id": batch.error_file_id,
+        }
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        info = self.status(batch_id)
+        for file_id in (info["output_file_id"], info["error_file_id"]):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id).text
+            for line in content.splitlines():
+                if line.strip():
+                    yield json.loads(line)
@@ -1,3 +1,5 @@
+import os
+
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
@@ -10,9 +12,12 @@ load_dotenv()
 
 
 def _get_llm():
+    timeout = os.getenv("EVALUATOR_TIMEOUT")
     return ChatOpenAI(
-        model="o4-mini",
-        max_retries=0,
+        model=os.getenv("EVALUATOR_MODEL", "o4-mini"),
+        base_url=os.getenv("EVALUATOR_BASE_URL") or None,
+        timeout=float(timeout) if timeout else None,
+        max_retries=int(os.getenv("EVALUATOR_MAX_RETRIES", "0")),
         reasoning={"effort": "medium"}
     )
 
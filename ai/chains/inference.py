@@ -1,10 +1,18 @@
+import os
+
 from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
 from langchain_ollama import ChatOllama
 from ai.chains.prompts import INFERENCE_PROMPT
+from core.chunking import CHUNK_WORDS, OVERLAP_WORDS, merge_chunk_quotes, split_context
 
 
 def _get_llm(model_name: str, temperature: float = 0):
-    return ChatOllama(model=model_name, temperature=temperature)
+    return ChatOllama(
+        model=model_name,
+        temperature=temperature,
+        base_url=os.getenv("INFERENCE_BASE_URL") or None,
+    )
 
 
 def get_chain(model_name: str, temperature: float = 0):
@@ -14,3 +22,36 @@ def get_chain(model_name: str, temperature: float = 0):
     )
     llm = _get_llm(model_name, temperature)
     return prompt | llm
+
+
+def invoke_chunked(
+    chain,
+    question: str,
+    context: str,
+    chunk_words: int = CHUNK_WORDS,
+    overlap_words: int = OVERLAP_WORDS,
+    max_concurrency: int = 4,
+) -> str:
+    chunks = split_context(context, chunk_words, overlap_words)
+    if len(chunks) <= 1:
+        return chain.invoke({"question": question, "context": context}).content
+    outputs = chain.batch(
+        [{"question": question, "context": chunk.text} for chunk in chunks],
+        config={"max_concurrency": max_concurrency},
+    )
+    return merge_chunk_quotes(context, chunks, [output.content for output in outputs])
+
+
+def get_chunked_chain(
+    model_name: str,
+    temperature: float = 0,
+    chunk_words: int = CHUNK_WORDS,
+    overlap_words: int = OVERLAP_WORDS,
+    max_concurrency: int = 4,
+):
+    chain = get_chain(model_name, temperature)
+    return RunnableLambda(
+        lambda inputs: invoke_chunked(
+            chain, inputs["question"], inputs["context"], chunk_words, overlap_words, max_concurrency
+        )
+    )
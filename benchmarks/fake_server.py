@@ -0,0 +1,432 @@
+import argparse
+import email
+import email.policy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+CONTEXT_PATTERN = re.compile(r"Context:\s*(.*?)\s*(?:\n\s*Quotes:|$)", re.DOTALL)
+
+
+@dataclass
+class FakeServerConfig:
+    latency: float = 0.0
+    latency_dist: str = "fixed"
+    latency_sigma: float = 0.5
+    latency_per_word: float = 0.0
+    rate_429: float = 0.0
+    retry_after: float = 1.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 60.0
+    batch_delay: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class FakeServerStats:
+    requests: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    timeouts: int = 0
+    by_path: dict = field(default_factory=dict)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _text_of(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def fake_quotes(prompt: str) -> str:
+    match = CONTEXT_PATTERN.search(prompt)
+    sentences = [s.strip() for s in SENTENCE_SPLIT.split(match.group(1) if match else prompt) if s.strip()]
+    if not sentences:
+        return ""
+    digest = _digest(prompt)
+    k = min(len(sentences), 1 + digest[0] % 3)
+    picked = sorted({digest[1 + i] % len(sentences) for i in range(k)})
+    return "\n".join(f"##begin_quote## {sentences[i]} ##end_quote##" for i in picked)
+
+
+def fake_structured(prompt: str, schema: dict) -> str:
+    digest = _digest(prompt)
+    output = {}
+    for i, (name, spec) in enumerate(schema.get("properties", {}).items()):
+        byte = digest[i % len(digest)]
+        kind = spec.get("type")
+        if kind == "number":
+            output[name] = round(byte / 255, 2)
+        elif kind == "integer":
+            output[name] = int(byte)
+        elif kind == "boolean":
+            output[name] = bool(byte % 2)
+        else:
+            output[name] = ""
+    return json.dumps(output)
+
+
+def chat_completion(body: dict) -> dict:
+    prompt = "\n".join(_text_of(m.get("content")) for m in body.get("messages", []))
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        content = fake_structured(prompt, response_format["json_schema"].get("schema", {}))
+    else:
+        content = fake_quotes(prompt)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "refusal": None},
+            "finish_reason": "stop",
+            "logprobs": None,
+        }],
+        "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()), "total_tokens": len(prompt.split()) + len(content.split())},
+    }
+
+
+def _multipart_fields(content_type: str, data: bytes) -> dict:
+    message = email.message_from_bytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + data, policy=email.policy.HTTP
+    )
+    return {
+        part.get_param("name", header="content-disposition"): (
+            part.get_filename(), part.get_payload(decode=True)
+        )
+        for part in message.iter_parts()
+    }
+
+
+class FakeLLMServer:
+
+    def __init__(self, config: FakeServerConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeServerConfig()
+        self.stats = FakeServerStats()
+        self.rng = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.files: dict[str, dict] = {}
+        self.batches: dict[str, dict] = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self) -> tuple[float, float]:
+        c = self.config
+        with self.lock:
+            fault = self.rng.random()
+            if c.latency_dist == "uniform":
+                delay = self.rng.uniform(0, 2 * c.latency)
+            elif c.latency_dist == "exponential":
+                delay = self.rng.expovariate(1 / c.latency) if c.latency else 0.0
+            elif c.latency_dist == "lognormal":
+                delay = c.latency * self.rng.lognormvariate(0, c.latency_sigma) if c.latency else 0.0
+            else:
+                delay = c.latency
+        return fault, delay
+
+    def _count(self, path: str, outcome: str):
+        with self.lock:
+            self.stats.requests += 1
+            self.stats.by_path[path] = self.stats.by_path.get(path, 0) + 1
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+
+    def _create_file(self, filename: str, purpose: str, content: bytes) -> dict:
+        file_id = f"file-{uuid.uuid4().hex}"
+        meta = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self.lock:
+            self.files[file_id] = {"meta": meta, "content": content}
+        return meta
+
+    def _create_batch(self, body: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "in_progress_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "metadata": body.get("metadata"),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        timer = threading.Timer(self.config.batch_delay, self._run_batch, (batch_id,))
+        timer.daemon = True
+        timer.start()
+        return batch
+
+    def _run_batch(self, batch_id: str):
+        batch = self.batches[batch_id]
+        lines = self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+        outputs, errors = [], []
+        for line in filter(str.strip, lines):
+            request = json.loads(line)
+            fault, _ = self._draw()
+            entry = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"]}
+            if fault < self.config.rate_429:
+                entry["response"] = {"status_code": 429, "request_id": uuid.uuid4().hex, "body": {"error": {"message": "Rate limit reached"}}}
+                entry["error"] = None
+                errors.append(entry)
+            else:
+                entry["response"] = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": chat_completion(request["body"])}
+                entry["error"] = None
+                outputs.append(entry)
+        with self.lock:
+            batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        for key, entries in (("output_file_id", outputs), ("error_file_id", errors)):
+            if entries:
+                content = "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+                batch[key] = self._create_file(f"{batch_id}_{key}.jsonl", "batch_output", content)["id"]
+        with self.lock:
+            batch["status"] = "completed"
+            batch["completed_at"] = int(time.time())
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in server.batches:
+                    self._send_json(200, server.batches[parts[2]])
+                elif parts[:2] == ["v1", "files"] and len(parts) >= 3 and parts[2] in server.files:
+                    stored = server.files[parts[2]]
+                    if parts[3:] == ["content"]:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "application/octet-stream")
+                        self.send_header("Content-Length", str(len(stored["content"])))
+                        self.end_headers()
+                        self.wfile.write(stored["content"])
+                    else:
+                        self._send_json(200, stored["meta"])
+                elif self.path in ("/health", "/"):
+                    self._send_json(200, {"status": "ok"})
+                elif self.path == "/stats":
+                    self._send_json(200, server.stats.__dict__)
+                elif self.path == "/api/tags":
+                    self._send_json(200, {"models": []})
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                data = self.rfile.read(length)
+                if self.path == "/v1/files":
+                    fields = _multipart_fields(self.headers.get("Content-Type", ""), data)
+                    filename, content = fields["file"]
+                    purpose = fields.get("purpose", (None, b"batch"))[1].decode()
+                    self._send_json(200, server._create_file(filename or "upload.jsonl", purpose, content))
+                    return
+                body = json.loads(data or b"{}")
+                if self.path == "/v1/batches":
+                    self._send_json(200, server._create_batch(body))
+                    return
+                routes = {
+                    "/v1/chat/completions": self._chat_completions,
+                    "/v1/responses": self._responses,
+                    "/api/chat": self._ollama_chat,
+                }
+                route = routes.get(self.path.split("?")[0])
+                if route is None:
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                fault, delay = server._draw()
+                config = server.config
+                if fault < config.rate_429:
+                    server._count(self.path, "rate_limited")
+                    self._send_json(
+                        429,
+                        {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded", "code": "rate_limit_exceeded"}},
+                        {"Retry-After": str(config.retry_after)},
+                    )
+                    return
+                if fault < config.rate_429 + config.timeout_rate:
+                    server._count(self.path, "timeouts")
+                    time.sleep(config.timeout_seconds)
+                    try:
+                        self._send_json(504, {"error": {"message": "Upstream timeout"}})
+                    except OSError:
+                        pass
+                    return
+                time.sleep(delay + config.latency_per_word * len(json.dumps(body.get("messages") or body.get("input") or "").split()))
+                try:
+                    route(body)
+                    server._count(self.path, "ok")
+                except OSError:
+                    pass
+
+            def _chat_completions(self, body: dict):
+                self._send_json(200, chat_completion(body))
+
+            def _responses(self, body: dict):
+                items = body.get("input", "")
+                if isinstance(items, str):
+                    prompt = items
+                else:
+                    prompt = "\n".join(_text_of(item.get("content")) for item in items if isinstance(item, dict))
+                text_format = (body.get("text") or {}).get("format") or {}
+                if text_format.get("type") == "json_schema":
+                    content = fake_structured(prompt, text_format.get("schema", {}))
+                else:
+                    content = fake_quotes(prompt)
+                self._send_json(200, {
+                    "id": f"resp_{uuid.uuid4().hex}",
+                    "object": "response",
+                    "created_at": int(time.time()),
+                    "status": "completed",
+                    "model": body.get("model", "fake"),
+                    "output": [{
+                        "type": "message",
+                        "id": f"msg_{uuid.uuid4().hex}",
+                        "status": "completed",
+                        "role": "assistant",
+                        "content": [{"type": "output_text", "text": content, "annotations": []}],
+                    }],
+                    "parallel_tool_calls": True,
+                    "tool_choice": "auto",
+                    "tools": [],
+                    "usage": {
+                        "input_tokens": len(prompt.split()),
+                        "input_tokens_details": {"cached_tokens": 0},
+                        "output_tokens": len(content.split()),
+                        "output_tokens_details": {"reasoning_tokens": 0},
+                        "total_tokens": len(prompt.split()) + len(content.split()),
+                    },
+                })
+
+            def _ollama_chat(self, body: dict):
+                prompt = "\n".join(_text_of(m.get("content")) for m in body.get("messages", []))
+                content = fake_quotes(prompt)
+                model = body.get("model", "fake")
+                created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                final = {
+                    "model": model,
+                    "created_at": created,
+                    "message": {"role": "assistant", "content": ""},
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": 0,
+                    "prompt_eval_count": len(prompt.split()),
+                    "eval_count": len(content.split()),
+                }
+                if not body.get("stream", True):
+                    final["message"]["content"] = content
+                    self._send_json(200, final)
+                    return
+                lines = [
+                    {"model": model, "created_at": created, "message": {"role": "assistant", "content": piece}, "done": False}
+                    for piece in re.findall(r"\S+\s*", content)
+                ] + [final]
+                payload = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "exponential", "lognormal"], dest="latency_dist")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, dest="latency_sigma")
+    parser.add_argument("--latency-per-word", type=float, default=0.0, dest="latency_per_word")
+    parser.add_argument("--rate-429", type=float, default=0.0, dest="rate_429")
+    parser.add_argument("--retry-after", type=float, default=1.0, dest="retry_after")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, dest="timeout_rate")
+    parser.add_argument("--timeout-seconds", type=float, default=60.0, dest="timeout_seconds")
+    parser.add_argument("--batch-delay", type=float, default=0.0, dest="batch_delay")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    config = FakeServerConfig(
+        latency=args.latency,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        latency_per_word=args.latency_per_word,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        batch_delay=args.batch_delay,
+        seed=args.seed,
+    )
+    server = FakeLLMServer(config, args.host, args.port)
+    print(f"Fake LLM server on {server.url}")
+    print(f"  EVALUATOR_BASE_URL={server.url}/v1  INFERENCE_BASE_URL={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from core.grounding import ContextIndex
+from core.metrics import bm25_score
+from core.quote_utils import format_score, parse_quotes
+from benchmarks.synthetic import SIZES, StubJudge, make_samples, make_scored_docs
+from services.evaluator.aggregate import get_model_averages_llmquoter_test
+from services.evaluator.llm_eval import evaluate_single_model
+from storage import get_store
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+MEMORY_SAMPLE = 200
+ENTRYPOINT = Path(__file__).resolve().parent.parent / "main.py"
+STARTUP_COMMANDS = {
+    "startup_help": ["--help"],
+    "startup_averages_help": ["averages", "--help"],
+    "startup_averages": ["averages", "--connection", "sqlite://"],
+}
+HEAVY_MODULES = ("langchain", "langchain_openai", "langchain_ollama", "datasets", "pyarrow", "dotenv")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _report(name: str, size: str, items: int, wall: float, latencies: list[float], peak: int) -> dict:
+    return {
+        "stage": name,
+        "size": size,
+        "items": items,
+        "seconds": round(wall, 6),
+        "throughput": round(items / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 4),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 4),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 4) if latencies else 0.0,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_ops(name: str, size: str, ops: list[Callable[[], object]]) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for op in ops:
+        t = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - t)
+    wall = time.perf_counter() - start
+    tracemalloc.start()
+    for op in ops[:MEMORY_SAMPLE]:
+        op()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return _report(name, size, len(ops), wall, latencies, peak)
+
+
+def bench_core(size_name: str, samples: list[dict]) -> list[dict]:
+    responses = [s["system_response"] for s in samples]
+    indexes = [ContextIndex(s["context"]) for s in samples]
+    return [
+        bench_ops("parse_quotes", size_name, [lambda r=r: parse_quotes(r) for r in responses]),
+        bench_ops("format_score", size_name, [lambda r=r: format_score(r) for r in responses]),
+        bench_ops("bm25_score", size_name, [
+            lambda s=s: bm25_score(s["ground_truth"], s["system_response"]) for s in samples
+        ]),
+        bench_ops("grounding_index", size_name, [lambda s=s: ContextIndex(s["context"]) for s in samples]),
+        bench_ops("grounding_score", size_name, [
+            lambda i=i, r=r: i.score(r, 0.1) for i, r in zip(indexes, responses)
+        ]),
+    ]
+
+
+def bench_averages(size_name: str, size: dict, rng: random.Random, repeat: int) -> dict:
+    database_name = f"bench_{size_name}_averages"
+    collection = get_store("sqlite://", database_name).collection("LLMQuoterTest")
+    collection.drop()
+    collection.insert_many(make_scored_docs(rng, size["docs"], size["models"]))
+    ops = [
+        lambda: get_model_averages_llmquoter_test(None, "LLMQuoterTest", "sqlite://", database_name)
+        for _ in range(repeat)
+    ]
+    result = bench_ops("get_model_averages", size_name, ops)
+    result["docs"] = size["docs"]
+    result["models"] = size["models"]
+    return result
+
+
+def bench_evaluate(size_name: str, samples: list[dict], judge: StubJudge, max_workers: int) -> dict:
+    database_name = f"bench_{size_name}_evaluate"
+    collection = get_store("sqlite://", database_name).collection("LLMQuoterTest")
+    collection.drop()
+    collection.create_index("uuid", unique=True)
+    collection.insert_many([{"uuid": s["uuid"], "quotes": s["ground_truth"]} for s in samples])
+    latencies = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        evaluate_single_model(
+            samples,
+            max_workers=max_workers,
+            model_name="bench",
+            save_to_mongo=True,
+            collection_name="LLMQuoterTest",
+            id_field="uuid",
+            verbose=False,
+            connection_string="sqlite://",
+            database_name=database_name,
+            chain_factory=lambda: judge,
+            latencies=latencies,
+        )
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = _report("evaluate_single_model", size_name, len(samples), wall, latencies, peak)
+    result["judge_latency_ms"] = judge.latency * 1000
+    result["judge_p50_ms"] = round(_percentile(judge.latencies, 0.50) * 1000, 4)
+    result["judge_p95_ms"] = round(_percentile(judge.latencies, 0.95) * 1000, 4)
+    result["max_workers"] = max_workers
+    return result
+
+
+def import_times(argv: list[str], top: int = 10) -> tuple[list[tuple[str, int]], list[str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(ENTRYPOINT), *argv],
+        capture_output=True, text=True, cwd=ENTRYPOINT.parent,
+    )
+    loaded, modules = set(), []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        loaded.add(name.strip().split(".")[0])
+        if not name.startswith("  "):
+            modules.append((name.strip(), int(cumulative)))
+    heavy = sorted(m for m in HEAVY_MODULES if m in loaded)
+    return sorted(modules, key=lambda m: -m[1])[:top], heavy
+
+
+def bench_startup(repeat: int) -> list[dict]:
+    results = []
+    for name, argv in STARTUP_COMMANDS.items():
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, str(ENTRYPOINT), *argv],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ENTRYPOINT.parent,
+            )
+            latencies.append(time.perf_counter() - start)
+        result = _report(name, "-", repeat, sum(latencies), latencies, 0)
+        top, heavy = import_times(argv)
+        result["top_imports_ms"] = {module: round(us / 1000, 2) for module, us in top}
+        result["heavy_imports"] = heavy
+        results.append(result)
+    return results
+
+
+def run(sizes: list[str], judge_latency: float, judge_jitter: float, max_workers: int, repeat: int, seed: int) -> list[dict]:
+    results = bench_startup(repeat)
+    for size_name in sizes:
+        size = SIZES[size_name]
+        rng = random.Random(seed)
+        samples = make_samples(rng, size["samples"], size)
+        results.extend(bench_core(size_name, samples))
+        results.append(bench_averages(size_name, size, rng, repeat))
+        judge = StubJudge(judge_latency, judge_jitter, seed)
+        results.append(bench_evaluate(size_name, samples, judge, max_workers))
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    reference = {(r["stage"], r["size"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        base = reference.get((r["stage"], r["size"]))
+        if not base:
+            r["vs_baseline"] = None
+            continue
+        speedup = r["throughput"] / base["throughput"] if base["throughput"] else 0.0
+        memory = r["peak_kb"] / base["peak_kb"] if base["peak_kb"] else 1.0
+        r["vs_baseline"] = {"throughput": round(speedup, 3), "peak_kb": round(memory, 3)}
+        if speedup < 1 - tolerance or memory > 1 + tolerance:
+            regressions.append(r)
+    return regressions
+
+
+def print_results(results: list[dict]):
+    print(f"{'Stage':<24} {'Size':<8} {'Items':<8} {'Ops/s':<12} {'p50 ms':<10} {'p95 ms':<10} {'p99 ms':<10} {'Peak KB':<10} {'vs base':<10}")
+    print("-" * 110)
+    for r in results:
+        vs = r.get("vs_baseline")
+        vs_text = f"{vs['throughput']:.2f}x" if vs else "-"
+        print(f"{r['stage']:<24} {r['size']:<8} {r['items']:<8} {r['throughput']:<12.1f} {r['p50_ms']:<10.3f} {r['p95_ms']:<10.3f} {r['p99_ms']:<10.3f} {r['peak_kb']:<10.1f} {vs_text:<10}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=sorted(SIZES))
+    parser.add_argument("--judge-latency", type=float, default=0.02, dest="judge_latency")
+    parser.add_argument("--judge-jitter", type=float, default=0.005, dest="judge_jitter")
+    parser.add_argument("--max-workers", type=int, default=8, dest="max_workers")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", dest="save_baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--fail-on-regression", action="store_true", dest="fail_on_regression")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+    results = run(args.sizes, args.judge_latency, args.judge_jitter, args.max_workers, args.repeat, args.seed)
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text())
+        regressions = compare(results, baseline["results"], args.tolerance)
+    print_results(results)
+    payload = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(payload, indent=2))
+        print(f"Saved baseline to {baseline_path}")
+    elif not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+    for r in results:
+        if r.get("heavy_imports"):
+            print(f"{r['stage']} imports heavy modules: {', '.join(r['heavy_imports'])}")
+    if regressions:
+        print(f"\n{len(regressions)} regressions beyond {args.tolerance:.0%}:")
+        for r in regressions:
+            print(f"  {r['stage']} [{r['size']}] throughput {r['vs_baseline']['throughput']:.2f}x peak {r['vs_baseline']['peak_kb']:.2f}x")
+        if args.fail_on_regression:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import hashlib
+import random
+import threading
+import time
+
+from ai.parsers import RecallPrecisionOutput
+
+VOCABULARY = [
+    "film", "directed", "released", "american", "company", "studio", "album", "band", "river", "city",
+    "county", "population", "founded", "university", "league", "season", "player", "football", "born",
+    "known", "series", "television", "novel", "author", "published", "station", "railway", "district",
+    "village", "church", "history", "century", "war", "army", "general", "president", "election", "party",
+    "record", "label", "single", "chart", "song", "written", "produced", "stars", "role", "award",
+]
+
+SIZES = {
+    "small": {"quotes": 2, "quote_words": 15, "context_sentences": 20, "docs": 200, "models": 4, "samples": 40},
+    "medium": {"quotes": 6, "quote_words": 25, "context_sentences": 60, "docs": 2000, "models": 8, "samples": 200},
+    "large": {"quotes": 16, "quote_words": 40, "context_sentences": 200, "docs": 10000, "models": 16, "samples": 600},
+}
+
+
+def make_sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + "."
+
+
+def make_context(rng: random.Random, sentences: int, words: int) -> list[str]:
+    return [make_sentence(rng, words) for _ in range(sentences)]
+
+
+def format_quotes(quotes: list[str]) -> str:
+    return "\n".join(f"##begin_quote## {q} ##end_quote##" for q in quotes)
+
+
+def make_response(rng: random.Random, context: list[str], quotes: int, noise: float = 0.3) -> str:
+    picked = rng.sample(context, min(quotes, len(context)))
+    picked = [make_sentence(rng, len(q.split())) if rng.random() < noise else q for q in picked]
+    return format_quotes(picked)
+
+
+def make_samples(rng: random.Random, n: int, size: dict) -> list[dict]:
+    samples = []
+    for i in range(n):
+        context = make_context(rng, size["context_sentences"], size["quote_words"])
+        samples.append({
+            "uuid": f"bench-{i:06d}",
+            "context": " ".join(context),
+            "ground_truth": make_response(rng, context, size["quotes"], noise=0.0),
+            "system_response": make_response(rng, context, size["quotes"]),
+        })
+    return samples
+
+
+def make_scored_docs(rng: random.Random, n_docs: int, n_models: int, coverage: float = 0.9) -> list[dict]:
+    docs = []
+    for i in range(n_docs):
+        scores = {}
+        for m in range(n_models):
+            if rng.random() < coverage:
+                recall, precision = rng.random(), rng.random()
+                scores[f"model_{m:02d}"] = {
+                    "recall": recall,
+                    "precision": precision,
+                    "f1": 2 * recall * precision / (recall + precision) if recall + precision else 0.0,
+                    "bm25": rng.random(),
+                    "format_score": 1.0 if rng.random() < 0.95 else 0.0,
+                }
+        docs.append({"uuid": f"bench-{i:06d}", "scores": scores})
+    return docs
+
+
+class StubJudge:
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latencies: list[float] = []
+
+    def invoke(self, inputs: dict) -> RecallPrecisionOutput:
+        start = time.perf_counter()
+        with self.lock:
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        if delay:
+            time.sleep(delay)
+        digest = hashlib.sha256(f"{inputs['ground_truth']}|{inputs['system_response']}".encode()).digest()
+        output = RecallPrecisionOutput(recall=round(digest[0] / 255, 4), precision=round(digest[1] / 255, 4))
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+        return output
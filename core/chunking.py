@@ -0,0 +1,67 @@
+import re
+from dataclasses import dataclass
+
+from core.grounding import find_bounded, normalize_text
+from core.quote_utils import parse_quotes
+
+SENTENCE_PATTERN = re.compile(r"[^\n.!?]*(?:[.!?]+[\"')\]]*|\n+|$)")
+CHUNK_WORDS = 300
+OVERLAP_WORDS = 40
+
+
+@dataclass
+class Chunk:
+    start: int
+    end: int
+    text: str
+
+
+def split_sentences(context: str) -> list[tuple[int, int]]:
+    spans = []
+    for match in SENTENCE_PATTERN.finditer(context):
+        if match.group().strip():
+            spans.append((match.start(), match.end()))
+    return spans
+
+
+def split_context(context: str, chunk_words: int = CHUNK_WORDS, overlap_words: int = OVERLAP_WORDS) -> list[Chunk]:
+    spans = split_sentences(context)
+    if not spans:
+        return []
+    counts = [len(context[s:e].split()) for s, e in spans]
+    if sum(counts) <= chunk_words:
+        return [Chunk(0, len(context), context)]
+    chunks = []
+    first = 0
+    while first < len(spans):
+        last, words = first, 0
+        while last < len(spans) and (words + counts[last] <= chunk_words or last == first):
+            words += counts[last]
+            last += 1
+        start, end = spans[first][0], spans[last - 1][1]
+        chunks.append(Chunk(start, end, context[start:end].strip()))
+        if last >= len(spans):
+            break
+        next_first, overlap = last, 0
+        while next_first - 1 > first and overlap + counts[next_first - 1] <= overlap_words:
+            next_first -= 1
+            overlap += counts[next_first]
+        first = next_first
+    return chunks
+
+
+def merge_chunk_quotes(context: str, chunks: list[Chunk], responses: list[str]) -> str:
+    normalized_context = normalize_text(context)
+    candidates = []
+    for chunk, response in zip(chunks, responses):
+        chunk_position = len(normalize_text(context[:chunk.start]))
+        for order, quote in enumerate(parse_quotes(response)):
+            key = normalize_text(quote)
+            position = normalized_context.find(key)
+            candidates.append((position if position >= 0 else chunk_position, order, key, quote))
+    kept = []
+    for candidate in sorted(candidates, key=lambda c: -len(c[2])):
+        if not any(find_bounded(other[2], candidate[2]) >= 0 for other in kept):
+            kept.append(candidate)
+    kept.sort(key=lambda c: (c[0], c[1]))
+    return "\n".join(f"##begin_quote## {quote} ##end_quote##" for _, _, _, quote in kept)
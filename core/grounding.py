@@ -0,0 +1,102 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+from core.quote_utils import parse_quotes
+
+NGRAM_SIZE = 3
+MAX_CANDIDATES = 4
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(text.split())
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def find_bounded(text: str, quote: str) -> int:
+    start = text.find(quote)
+    while start >= 0:
+        end = start + len(quote)
+        joined_left = start > 0 and _is_word_char(text[start - 1]) and _is_word_char(quote[0])
+        joined_right = end < len(text) and _is_word_char(text[end]) and _is_word_char(quote[-1])
+        if not joined_left and not joined_right:
+            return start
+        start = text.find(quote, start + 1)
+    return -1
+
+
+def substring_edit_distance(pattern: str, text: str) -> int:
+    if not pattern:
+        return 0
+    prev = list(range(len(pattern) + 1))
+    best = prev[-1]
+    for ch in text:
+        cur = [0]
+        for i, p in enumerate(pattern, start=1):
+            cur.append(min(prev[i - 1] + (p != ch), prev[i] + 1, cur[i - 1] + 1))
+        best = min(best, cur[-1])
+        prev = cur
+    return best
+
+
+class ContextIndex:
+
+    def __init__(self, context: str, ngram_size: int = NGRAM_SIZE):
+        self.text = normalize_text(context)
+        self.ngram_size = ngram_size
+        words = list(WORD_PATTERN.finditer(self.text))
+        self.word_offsets = [m.start() for m in words]
+        self.tokens = [m.group() for m in words]
+        self.ngrams: dict[tuple[str, ...], list[int]] = defaultdict(list)
+        for i in range(len(self.tokens) - ngram_size + 1):
+            self.ngrams[tuple(self.tokens[i:i + ngram_size])].append(i)
+
+    def _candidate_anchors(self, tokens: list[str], min_votes: int) -> list[int]:
+        votes = Counter()
+        for i in range(len(tokens) - self.ngram_size + 1):
+            for pos in self.ngrams.get(tuple(tokens[i:i + self.ngram_size]), ()):
+                votes[pos - i] += 1
+        return [anchor for anchor, count in votes.most_common(MAX_CANDIDATES) if count >= min_votes]
+
+    def _token_anchors(self, tokens: list[str]) -> set[int]:
+        wanted = {token: i for i, token in enumerate(tokens)}
+        return {pos - wanted[token] for pos, token in enumerate(self.tokens) if token in wanted}
+
+    def _matches_at(self, quote: str, anchor: int, max_distance: int) -> bool:
+        start = self.word_offsets[max(0, anchor)] if anchor < len(self.word_offsets) else len(self.text)
+        window = self.text[max(0, start - max_distance):start + len(quote) + max_distance]
+        return substring_edit_distance(quote, window) <= max_distance
+
+    def contains(self, quote: str, max_edit_ratio: float = 0.0) -> bool:
+        quote = normalize_text(quote)
+        if not quote:
+            return False
+        if find_bounded(self.text, quote) >= 0:
+            return True
+        max_distance = int(len(quote) * max_edit_ratio)
+        tokens = quote.split()
+        if max_distance == 0:
+            return False
+        if len(tokens) <= self.ngram_size:
+            if len(tokens) <= 2 * max_distance:
+                return substring_edit_distance(quote, self.text) <= max_distance
+            return any(self._matches_at(quote, anchor, max_distance) for anchor in self._token_anchors(tokens))
+        n_grams = len(tokens) - self.ngram_size + 1
+        min_votes = max(1, n_grams - (self.ngram_size + 1) * max_distance)
+        return any(self._matches_at(quote, anchor, max_distance) for anchor in self._candidate_anchors(tokens, min_votes))
+
+    def score(self, system_response: str, max_edit_ratio: float = 0.0) -> float:
+        quotes = parse_quotes(system_response)
+        if not quotes:
+            return 0.0
+        found = sum(1 for q in quotes if self.contains(q, max_edit_ratio))
+        return round(found / len(quotes), 4)
+
+
+def grounding_score(context: str, system_response: str, max_edit_ratio: float = 0.0) -> float:
+    return ContextIndex(context).score(system_response, max_edit_ratio)
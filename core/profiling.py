@@ -0,0 +1,167 @@
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+DEFAULT_RUNS_DIR = os.getenv("LLMQUOTER_RUNS_DIR", "runs")
+PROFILE_BACKENDS = ("cprofile", "pyinstrument")
+TOP_STATS = 30
+
+_active: dict[str, Path] = {}
+
+
+def peak_rss_kb() -> dict:
+    try:
+        import resource
+    except ImportError:
+        return {}
+    scale = 1 / 1024 if sys.platform == "darwin" else 1
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale, 1),
+    }
+
+
+def create_run_dir(name: str, runs_dir: str = DEFAULT_RUNS_DIR) -> Path:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = Path(runs_dir) / f"{name}-{stamp}"
+    suffix = 1
+    while path.exists():
+        suffix += 1
+        path = Path(runs_dir) / f"{name}-{stamp}-{suffix}"
+    path.mkdir(parents=True)
+    return path
+
+
+def _write_json(path: Path, payload: dict):
+    path.write_text(json.dumps(payload, indent=2, default=str))
+
+
+class _CProfileBackend:
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self, run_dir: Path, top: int):
+        self.profiler.disable()
+        self.profiler.dump_stats(run_dir / "profile.prof")
+        buffer = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=buffer)
+        stats.sort_stats("cumulative").print_stats(top)
+        stats.sort_stats("tottime").print_stats(top)
+        (run_dir / "profile.txt").write_text(buffer.getvalue())
+
+
+class _PyinstrumentBackend:
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("pyinstrument is required for --profile pyinstrument: pip install pyinstrument") from e
+        self.profiler = Profiler(async_mode="disabled")
+
+    def start(self):
+        self.profiler.start()
+
+    def stop(self, run_dir: Path, top: int):
+        self.profiler.stop()
+        (run_dir / "profile.html").write_text(self.profiler.output_html())
+        (run_dir / "profile.txt").write_text(self.profiler.output_text(unicode=True, show_all=False))
+
+
+def _profile_backend(profile: bool | str):
+    backend = "cprofile" if profile is True else profile
+    if backend == "cprofile":
+        return _CProfileBackend()
+    if backend == "pyinstrument":
+        return _PyinstrumentBackend()
+    raise ValueError(f"Unknown profile backend {profile!r}; expected one of {PROFILE_BACKENDS}")
+
+
+def _write_memory(run_dir: Path, snapshot: tracemalloc.Snapshot, top: int):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    stats = snapshot.statistics("lineno")
+    lines = [f"{'Size KB':>10} {'Count':>8}  Location"]
+    lines += [
+        f"{stat.size / 1024:>10.1f} {stat.count:>8}  {stat.traceback[0].filename}:{stat.traceback[0].lineno}"
+        for stat in stats[:top]
+    ]
+    (run_dir / "memory.txt").write_text("\n".join(lines) + "\n")
+    return [
+        {
+            "file": stat.traceback[0].filename,
+            "line": stat.traceback[0].lineno,
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in stats[:top]
+    ]
+
+
+@contextmanager
+def profiled_run(
+    name: str,
+    params: dict,
+    profile: bool | str = False,
+    trace_memory: bool = False,
+    runs_dir: str = DEFAULT_RUNS_DIR,
+    top: int = TOP_STATS,
+) -> Iterator[Path | None]:
+    if not (profile or trace_memory) or _active:
+        yield None
+        return
+    backend = _profile_backend(profile) if profile else None
+    run_dir = create_run_dir(name, runs_dir)
+    _write_json(run_dir / "params.json", {
+        "name": name,
+        "params": params,
+        "argv": sys.argv,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "profile": profile,
+        "trace_memory": trace_memory,
+    })
+    _active["run"] = run_dir
+    status = "ok"
+    if trace_memory:
+        tracemalloc.start(10)
+    start = time.perf_counter()
+    if backend:
+        backend.start()
+    try:
+        yield run_dir
+    except BaseException as e:
+        status = f"error: {type(e).__name__}: {e}"
+        raise
+    finally:
+        if backend:
+            backend.stop(run_dir, top)
+        wall = time.perf_counter() - start
+        summary = {"status": status, "seconds": round(wall, 3), "peak_rss_kb": peak_rss_kb()}
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            summary["traced_current_kb"] = round(current / 1024, 1)
+            summary["traced_peak_kb"] = round(peak / 1024, 1)
+            summary["top_allocations"] = _write_memory(run_dir, tracemalloc.take_snapshot(), top)
+            tracemalloc.stop()
+        _write_json(run_dir / "summary.json", summary)
+        _active.clear()
+        print(f"Run artifacts written to {run_dir}")
@@ -0,0 +1,119 @@
+import math
+import warnings
+
+import numpy as np
+
+DEFAULT_RESAMPLES = 2000
+BLOCK_SIZE = 256
+
+
+def _poisson_table(resolution: int = 1 << 16) -> np.ndarray:
+    pmf = [math.exp(-1.0) / math.factorial(k) for k in range(16)]
+    quantiles = (np.arange(resolution) + 0.5) / resolution
+    return np.searchsorted(np.cumsum(pmf), quantiles).astype(np.float32)
+
+
+POISSON_TABLE = _poisson_table()
+
+
+def _resample_weights(rng: np.random.Generator, n: int, size: int) -> np.ndarray:
+    draws = np.frombuffer(rng.bytes(size * n * 2), dtype=np.uint16).reshape(size, n)
+    return POISSON_TABLE[draws]
+
+
+def _random_signs(rng: np.random.Generator, n: int, size: int) -> np.ndarray:
+    bits = np.unpackbits(np.frombuffer(rng.bytes((size * n + 7) // 8), dtype=np.uint8))
+    return bits[:size * n].reshape(size, n).astype(np.float32) * 2.0 - 1.0
+
+
+def _blocks(resamples: int):
+    for start in range(0, resamples, BLOCK_SIZE):
+        yield min(BLOCK_SIZE, resamples - start)
+
+
+def _masked(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    mask = ~np.isnan(values)
+    return np.where(mask, values, 0.0).astype(np.float32), mask.astype(np.float32)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return numerator / denominator
+
+
+def _interval(boot: np.ndarray, confidence: float) -> tuple[np.ndarray, np.ndarray]:
+    alpha = (1.0 - confidence) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanquantile(boot, alpha, axis=0), np.nanquantile(boot, 1.0 - alpha, axis=0)
+
+
+def bootstrap_compare(
+    values: np.ndarray,
+    pairs: list[tuple[int, int]],
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int | None = 0,
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+    n, n_models = values.shape
+    filled, mask = _masked(values)
+    a = np.array([p[0] for p in pairs], dtype=np.int64)
+    b = np.array([p[1] for p in pairs], dtype=np.int64)
+    common = mask[:, a] * mask[:, b]
+    diffs = (filled[:, a] - filled[:, b]) * common
+    numerators = np.hstack([filled, diffs])
+    denominators = np.hstack([mask, common])
+    observed = _ratio(numerators.sum(axis=0, dtype=np.float64), denominators.sum(axis=0, dtype=np.float64))
+    n_common = denominators[:, n_models:].sum(axis=0)
+    rng = np.random.default_rng(seed)
+    boot = []
+    extreme = np.zeros(len(pairs))
+    for size in _blocks(resamples):
+        weights = _resample_weights(rng, n, size)
+        boot.append(_ratio(weights @ numerators, weights @ denominators))
+        if pairs:
+            permuted = _ratio(_random_signs(rng, n, size) @ diffs, n_common)
+            extreme += (np.abs(permuted) >= np.abs(observed[n_models:]) - 1e-6).sum(axis=0)
+    boot = np.vstack(boot).astype(np.float64)
+    low, high = _interval(boot, confidence)
+    diff_boot = boot[:, n_models:]
+    valid = (~np.isnan(diff_boot)).sum(axis=0)
+    p_bootstrap = 2 * _ratio(np.minimum((diff_boot <= 0).sum(axis=0), (diff_boot >= 0).sum(axis=0)), valid)
+    p_permutation = (extreme + 1) / (resamples + 1)
+    empty = n_common == 0
+    p_bootstrap[empty] = p_permutation[empty] = np.nan
+    low[n_models:][empty] = high[n_models:][empty] = np.nan
+    ci = {
+        "mean": observed[:n_models],
+        "low": low[:n_models],
+        "high": high[:n_models],
+        "count": mask.sum(axis=0).astype(np.int64),
+    }
+    paired = {
+        "diff": observed[n_models:],
+        "low": low[n_models:],
+        "high": high[n_models:],
+        "p_bootstrap": np.minimum(1.0, p_bootstrap),
+        "p_permutation": p_permutation,
+        "count": n_common.astype(np.int64),
+    }
+    return ci, paired
+
+
+def bootstrap_ci(
+    values: np.ndarray,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int | None = 0,
+) -> dict[str, np.ndarray]:
+    return bootstrap_compare(values, [], resamples, confidence, seed)[0]
+
+
+def paired_comparison(
+    values: np.ndarray,
+    pairs: list[tuple[int, int]],
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int | None = 0,
+) -> dict[str, np.ndarray]:
+    return bootstrap_compare(values, pairs, resamples, confidence, seed)[1]
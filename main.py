@@ -1,9 +1,7 @@
-from services.evaluator import (
-    evaluate_from_llmquoter_test,
-    print_model_averages_llmquoter_test,
-    update_scores_manually,
-)
+import sys
+
+from scripts.cli import main
 
 
 if __name__ == "__main__":
-    print_model_averages_llmquoter_test()
+    main(sys.argv[1:] or ["averages", "--compare", "f1", "bm25"])
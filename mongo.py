@@ -1,10 +1,11 @@
 import json
 from pathlib import Path
-from pymongo import MongoClient
-from pymongo.collection import Collection
 from typing import Any, Optional
 from pydantic import BaseModel, field_validator
 
+from core.profiling import DEFAULT_RUNS_DIR, profiled_run
+from storage import DEFAULT_CONNECTION, get_store
+
 
 class HotPotQADocument(BaseModel):
     hf_id: str
@@ -16,6 +17,14 @@ class HotPotQADocument(BaseModel):
     original_quotes: Optional[str] = None
     quotes: Optional[str] = None
     
+    @field_validator("context", mode="before")
+    @classmethod
+    def decompress_context(cls, v):
+        if isinstance(v, (bytes, bytearray)):
+            from storage.compression import decode_field
+            return decode_field(v)
+        return v
+
     @field_validator("quotes", "answer", mode="before")
     @classmethod
     def normalize_text_field(cls, v):
@@ -33,13 +42,25 @@ class HotPotQAMongo:
     
     def __init__(
         self,
-        connection_string: str = "mongodb://localhost:27017",
-        database_name: str = "llmquoter"
+        connection_string: str = DEFAULT_CONNECTION,
+        database_name: str = "llmquoter",
+        compress_context: bool = False,
     ):
-        self.client = MongoClient(connection_string)
-        self.db = self.client[database_name]
-        self.collection: Collection = self.db["HotPotQAQuotes"]
+        self.store = get_store(connection_string, database_name)
+        self.collection = self.store.collection("HotPotQAQuotes")
         self.collection.create_index("hf_id", unique=True)
+        self.collection.create_index("split")
+        self.compressor = None
+        if compress_context:
+            from storage.compression import ContextCompressor
+            self.compressor = ContextCompressor(self.store)
+
+    def _load(self, data: dict) -> HotPotQADocument:
+        data.pop("_id", None)
+        if isinstance(data.get("context"), (bytes, bytearray)):
+            from storage.compression import decode_field
+            data["context"] = decode_field(data["context"], self.store)
+        return HotPotQADocument(**data)
     
     def insert_one(self, doc: HotPotQADocument) -> str:
         result = self.collection.insert_one(doc.model_dump())
@@ -55,25 +76,37 @@ class HotPotQAMongo:
     def insert_batch(self, docs: list[HotPotQADocument]) -> int:
         if not docs:
             return 0
-        result = self.collection.insert_many([doc.model_dump() for doc in docs])
+        records = [doc.model_dump() for doc in docs]
+        if self.compressor:
+            self.compressor.compress_docs(records)
+        result = self.collection.insert_many(records)
         return len(result.inserted_ids)
     
     def find_by_hf_id(self, hf_id: str) -> Optional[HotPotQADocument]:
         data = self.collection.find_one({"hf_id": hf_id})
         if data:
-            data.pop("_id", None)
-            return HotPotQADocument(**data)
+            return self._load(data)
         return None
     
     def find_all(self, split: str = "") -> list[HotPotQADocument]:
         docs = []
         filter = {"split": split} if split else {}
         for data in self.collection.find(filter):
-            data.pop("_id", None)
-            docs.append(HotPotQADocument(**data))
+            docs.append(self._load(data))
         return docs
     
-    def populate(self, data_dir: str = "data") -> int:
+    def populate(
+        self,
+        data_dir: str = "data",
+        profile: bool | str = False,
+        trace_memory: bool = False,
+        runs_dir: str = DEFAULT_RUNS_DIR,
+    ) -> int:
+        params = {"data_dir": data_dir, "collection_name": "HotPotQAQuotes"}
+        with profiled_run("populate", params, profile, trace_memory, runs_dir):
+            return self._populate(data_dir)
+
+    def _populate(self, data_dir: str) -> int:
         data_path = Path(data_dir)
         files = {
             "train": data_path / "train.json",
@@ -114,7 +147,7 @@ class HotPotQAMongo:
         return total_inserted
     
     def close(self):
-        self.client.close()
+        self.collection = None
     
     def __enter__(self):
         return self
@@ -1,26 +1,10 @@
 import argparse
-from pathlib import Path
-
-from .dataset import (
-    fetch_all_from_mongo,
-    split_by_field,
-    build_dataset_dict,
-    push_to_hub,
-)
-from .mongo_ops import (
-    load_existing_dataset,
-    get_new_samples_from_mongo,
-    convert_doc_to_dict,
-    add_samples_to_dataset,
-    remove_columns_from_dataset,
-    load_raft_quotes_extended,
-    add_uuid_to_splits,
-    load_and_save_to_mongo,
-    update_mongo_from_data_inferences,
-)
+
+from storage import DEFAULT_CONNECTION, get_store
 
 
 def upload_hf(repo_name: str, private: bool):
+    from .dataset import fetch_all_from_mongo, split_by_field, build_dataset_dict, push_to_hub
     docs = fetch_all_from_mongo()
     splits = split_by_field(docs)
     dataset_dict = build_dataset_dict(splits)
@@ -35,6 +19,12 @@ def merge_raft(
     num_samples: int | None,
     push: bool,
 ):
+    from .mongo_ops import (
+        load_existing_dataset,
+        get_new_samples_from_mongo,
+        add_samples_to_dataset,
+        remove_columns_from_dataset,
+    )
     dataset, existing_questions = load_existing_dataset(source_dataset)
     if dataset is None:
         dataset = {}
@@ -50,6 +40,7 @@ def merge_raft(
 
 
 def add_uuids(dataset_name: str, splits: list[str], push: bool):
+    from .mongo_ops import add_uuid_to_splits
     add_uuid_to_splits(dataset_name, splits, push)
 
 
@@ -59,9 +50,11 @@ def save_to_mongo(
     collection_name: str,
     connection_string: str,
     database_name: str,
+    compress_context: bool = False,
 ):
+    from .mongo_ops import load_and_save_to_mongo
     count = load_and_save_to_mongo(
-        dataset_name, splits, collection_name, connection_string, database_name
+        dataset_name, splits, collection_name, connection_string, database_name, compress_context
     )
     print(f"Saved {count} documents to {collection_name}")
 
@@ -72,52 +65,408 @@ def update_inferences(
     connection_string: str,
     database_name: str,
 ):
+    from .mongo_ops import update_mongo_from_data_inferences
     update_mongo_from_data_inferences(
         data_dir, collection_name, connection_string, database_name
     )
     print("Done updating inferences")
 
 
-def main():
+def ingest(data_dir: str, connection_string: str, database_name: str, compress_context: bool = False):
+    from mongo import HotPotQAMongo
+    with HotPotQAMongo(connection_string, database_name, compress_context) as mongo:
+        mongo.populate(data_dir)
+
+
+def compress_context(
+    collection_names: list[str],
+    connection_string: str,
+    database_name: str,
+    decompress: bool = False,
+):
+    from storage.compression import migrate_collection
+    store = get_store(connection_string, database_name)
+    for collection_name in collection_names:
+        stats = migrate_collection(store, collection_name, decompress=decompress)
+        action = "Decompressed" if decompress else "Compressed"
+        print(f"\n=== {collection_name} ===")
+        print(f"{action} context in {stats['documents']} documents (dictionary {stats['dict_id']})")
+        print(f"Context bytes:  {stats['field_before']:>14,} -> {stats['field_after']:>14,} ({stats['field_ratio']:.2f}x)")
+        print(f"Document bytes: {stats['doc_before']:>14,} -> {stats['doc_after']:>14,} ({stats['doc_ratio']:.2f}x)")
+        if stats["documents"] and not decompress:
+            saved = (stats["doc_before"] - stats["doc_after"]) / stats["documents"]
+            print(f"Transfer per unprojected read: {saved:,.0f} bytes saved per document")
+
+
+def export_scores(
+    path: str,
+    collection_name: str,
+    connection_string: str,
+    database_name: str,
+):
+    from services.evaluator.snapshot import export_scores_snapshot
+    export_scores_snapshot(path, collection_name, connection_string, database_name)
+
+
+def indexes(
+    collection_name: str,
+    hotpot_collection: str,
+    connection_string: str,
+    database_name: str,
+    create: bool = True,
+):
+    from storage.indexes import ensure_indexes, explain_paths, index_specs, query_paths
+    store = get_store(connection_string, database_name)
+    if create:
+        print(f"{'Collection':<24} {'Index':<26} {'Status':<10}")
+        print("-" * 62)
+        for r in ensure_indexes(store, index_specs(collection_name, hotpot_collection)):
+            print(f"{r['collection']:<24} {r['name']:<26} {r['status']:<10}")
+    results = explain_paths(store, query_paths(store, collection_name, hotpot_collection))
+    print(f"\n{'Query path':<36} {'Plan':<10} {'Index':<26} {'Examined':<10} {'Returned':<10}")
+    print("-" * 94)
+    for r in results:
+        print(f"{r['path']:<36} {r['plan']:<10} {r['index'] or '-':<26} {str(r['examined']):<10} {str(r['returned']):<10}")
+    scans = [r["path"] for r in results if r["plan"] == "COLLSCAN"]
+    if scans:
+        print(f"\n{len(scans)} query paths still scan the collection: {', '.join(scans)}")
+    else:
+        print("\nAll query paths use an index")
+
+
+def _averages(args):
+    from services.evaluator.aggregate import print_model_averages_llmquoter_test, print_model_comparison_llmquoter_test
+    print_model_averages_llmquoter_test(
+        model_name=args.model,
+        collection_name=args.collection,
+        snapshot_path=args.snapshot,
+        from_summary=args.from_summary,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+    for metric in args.compare:
+        print_model_comparison_llmquoter_test(
+            metric=metric,
+            collection_name=args.collection,
+            snapshot_path=args.snapshot,
+            connection_string=args.connection,
+            database_name=args.database,
+        )
+
+
+def _compare(args):
+    from services.evaluator.aggregate import print_model_comparison_llmquoter_test
+    print_model_comparison_llmquoter_test(
+        metric=args.metric,
+        baseline_model=args.baseline_model,
+        collection_name=args.collection,
+        resamples=args.resamples,
+        confidence=args.confidence,
+        snapshot_path=args.snapshot,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _evaluate(args):
+    from services.evaluator.mongo_eval import evaluate_from_llmquoter_test
+    evaluate_from_llmquoter_test(
+        models=args.models,
+        uuid=args.uuid,
+        force=args.force,
+        verbose=args.verbose,
+        max_workers=args.max_workers,
+        collection_name=args.collection,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _batch_evaluate(args):
+    from services.evaluator.batch import evaluate_batch_llmquoter_test
+    evaluate_batch_llmquoter_test(
+        models=args.models,
+        force=args.force,
+        output_dir=args.output_dir,
+        batch_ids=args.batch_ids,
+        judge_model=args.judge_model,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+        collection_name=args.collection,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _infer(args):
+    if args.mode == "compare":
+        from services.inference.chunked import compare_inference_latency_llmquoter_test
+        compare_inference_latency_llmquoter_test(
+            model_name=args.model,
+            uuid=args.uuid,
+            limit=args.limit,
+            chunk_words=args.chunk_words,
+            overlap_words=args.overlap_words,
+            max_concurrency=args.max_concurrency,
+            collection_name=args.collection,
+            connection_string=args.connection,
+            database_name=args.database,
+        )
+        return
+    from services.inference.chunked import run_inference_llmquoter_test
+    run_inference_llmquoter_test(
+        model_name=args.model,
+        chunked=args.mode == "chunked",
+        inference_name=args.name,
+        uuid=args.uuid,
+        limit=args.limit,
+        force=args.force,
+        chunk_words=args.chunk_words,
+        overlap_words=args.overlap_words,
+        max_concurrency=args.max_concurrency,
+        max_workers=args.max_workers,
+        collection_name=args.collection,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _worker(args):
+    from services.evaluator.worker import run_evaluation_worker_llmquoter_test
+    run_evaluation_worker_llmquoter_test(
+        models=args.models,
+        batch_size=args.batch_size,
+        max_workers=args.max_workers,
+        flush_interval=args.flush_interval,
+        poll_interval=args.poll_interval,
+        use_change_stream=not args.no_change_stream,
+        max_retries=args.max_retries,
+        retry_backoff=args.retry_backoff,
+        max_batches=args.max_batches,
+        idle_exit=args.idle_exit,
+        collection_name=args.collection,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _progressive(args):
+    from services.evaluator.progressive import evaluate_progressive_llmquoter_test
+    evaluate_progressive_llmquoter_test(
+        model_name=args.model,
+        metric=args.metric,
+        stratify_by=None if args.stratify == "none" else args.stratify,
+        n_strata=args.strata,
+        target_ci_width=args.target_width,
+        min_samples=args.min_samples,
+        budget=args.budget,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        max_workers=args.max_workers,
+        collection_name=args.collection,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _grounding(args):
+    from services.evaluator.grounding import evaluate_grounding_llmquoter_test
+    evaluate_grounding_llmquoter_test(
+        models=args.models,
+        force=args.force,
+        max_edit_ratio=args.max_edit_ratio,
+        max_workers=args.max_workers,
+        collection_name=args.collection,
+        connection_string=args.connection,
+        database_name=args.database,
+    )
+
+
+def _rebuild_summary(args):
+    from services.evaluator.summary import rebuild_summary
+    rebuild_summary(args.collection, args.connection, args.database)
+
+
+def _add_storage_args(parser: argparse.ArgumentParser, collection: str | None = "LLMQuoterTest"):
+    if collection:
+        parser.add_argument("--collection", default=collection)
+    parser.add_argument("--connection", default=DEFAULT_CONNECTION)
+    parser.add_argument("--database", default="llmquoter")
+
+
+def _add_profile_args(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", nargs="?", const="cprofile", default=False, choices=["cprofile", "pyinstrument"])
+    parser.add_argument("--trace-memory", action="store_true", dest="trace_memory")
+    parser.add_argument("--runs-dir", default="runs", dest="runs_dir")
+
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     subparsers = parser.add_subparsers(dest="command")
+
+    avg_p = subparsers.add_parser("averages")
+    avg_p.add_argument("--model", default=None)
+    avg_p.add_argument("--snapshot", default=None)
+    avg_p.add_argument("--from-summary", action="store_true", dest="from_summary")
+    avg_p.add_argument("--compare", nargs="*", default=[], metavar="METRIC")
+    _add_storage_args(avg_p)
+    avg_p.set_defaults(handler=_averages)
+
+    cmp_p = subparsers.add_parser("compare")
+    cmp_p.add_argument("--metric", default="f1")
+    cmp_p.add_argument("--baseline-model", default=None, dest="baseline_model")
+    cmp_p.add_argument("--resamples", type=int, default=2000)
+    cmp_p.add_argument("--confidence", type=float, default=0.95)
+    cmp_p.add_argument("--snapshot", default=None)
+    _add_storage_args(cmp_p)
+    cmp_p.set_defaults(handler=_compare)
+
+    eval_p = subparsers.add_parser("evaluate")
+    eval_p.add_argument("--models", nargs="+", default=None)
+    eval_p.add_argument("--uuid", default=None)
+    eval_p.add_argument("--force", action="store_true")
+    eval_p.add_argument("--verbose", action="store_true", default=None)
+    eval_p.add_argument("--max-workers", type=int, default=5, dest="max_workers")
+    _add_storage_args(eval_p)
+    eval_p.set_defaults(handler=_evaluate)
+
+    batch_p = subparsers.add_parser("batch_evaluate")
+    batch_p.add_argument("--models", nargs="+", default=None)
+    batch_p.add_argument("--force", action="store_true")
+    batch_p.add_argument("--output-dir", default="batches", dest="output_dir")
+    batch_p.add_argument("--batch-ids", nargs="+", default=None, dest="batch_ids")
+    batch_p.add_argument("--judge-model", default=None, dest="judge_model")
+    batch_p.add_argument("--poll-interval", type=float, default=30.0, dest="poll_interval")
+    batch_p.add_argument("--timeout", type=float, default=None)
+    _add_storage_args(batch_p)
+    batch_p.set_defaults(handler=_batch_evaluate)
+
+    infer_p = subparsers.add_parser("infer")
+    infer_p.add_argument("--model", required=True)
+    infer_p.add_argument("--mode", default="chunked", choices=["chunked", "single", "compare"])
+    infer_p.add_argument("--name", default=None)
+    infer_p.add_argument("--uuid", default=None)
+    infer_p.add_argument("--limit", type=int, default=None)
+    infer_p.add_argument("--force", action="store_true")
+    infer_p.add_argument("--chunk-words", type=int, default=300, dest="chunk_words")
+    infer_p.add_argument("--overlap-words", type=int, default=40, dest="overlap_words")
+    infer_p.add_argument("--max-concurrency", type=int, default=4, dest="max_concurrency")
+    infer_p.add_argument("--max-workers", type=int, default=1, dest="max_workers")
+    _add_storage_args(infer_p)
+    infer_p.set_defaults(handler=_infer)
+
+    worker_p = subparsers.add_parser("worker")
+    worker_p.add_argument("--models", nargs="+", default=None)
+    worker_p.add_argument("--batch-size", type=int, default=50, dest="batch_size")
+    worker_p.add_argument("--max-workers", type=int, default=5, dest="max_workers")
+    worker_p.add_argument("--flush-interval", type=float, default=2.0, dest="flush_interval")
+    worker_p.add_argument("--poll-interval", type=float, default=5.0, dest="poll_interval")
+    worker_p.add_argument("--no-change-stream", action="store_true", dest="no_change_stream")
+    worker_p.add_argument("--max-batches", type=int, default=None, dest="max_batches")
+    worker_p.add_argument("--idle-exit", type=float, default=None, dest="idle_exit")
+    worker_p.add_argument("--max-retries", type=int, default=3, dest="max_retries")
+    worker_p.add_argument("--retry-backoff", type=float, default=30.0, dest="retry_backoff")
+    _add_storage_args(worker_p)
+    worker_p.set_defaults(handler=_worker)
+
+    prog_p = subparsers.add_parser("progressive")
+    prog_p.add_argument("--model", required=True)
+    prog_p.add_argument("--metric", default="f1")
+    prog_p.add_argument("--stratify", default="context_length", choices=["context_length", "level", "none"])
+    prog_p.add_argument("--strata", type=int, default=4)
+    prog_p.add_argument("--target-width", type=float, default=0.05, dest="target_width")
+    prog_p.add_argument("--min-samples", type=int, default=30, dest="min_samples")
+    prog_p.add_argument("--budget", type=int, default=None)
+    prog_p.add_argument("--batch-size", type=int, default=20, dest="batch_size")
+    prog_p.add_argument("--seed", type=int, default=0)
+    prog_p.add_argument("--max-workers", type=int, default=5, dest="max_workers")
+    _add_storage_args(prog_p)
+    prog_p.set_defaults(handler=_progressive)
+
+    gr_p = subparsers.add_parser("grounding")
+    gr_p.add_argument("--models", nargs="+", default=None)
+    gr_p.add_argument("--force", action="store_true")
+    gr_p.add_argument("--max-edit-ratio", type=float, default=0.1, dest="max_edit_ratio")
+    gr_p.add_argument("--max-workers", type=int, default=4, dest="max_workers")
+    _add_storage_args(gr_p)
+    gr_p.set_defaults(handler=_grounding)
+
+    ing_p = subparsers.add_parser("ingest")
+    ing_p.add_argument("--data_dir", default="data")
+    ing_p.add_argument("--compress-context", action="store_true", dest="compress_context")
+    _add_storage_args(ing_p, collection=None)
+    ing_p.set_defaults(handler=lambda a: ingest(a.data_dir, a.connection, a.database, a.compress_context))
+
+    cc_p = subparsers.add_parser("compress_context")
+    cc_p.add_argument("--collections", nargs="+", default=["HotPotQAQuotes", "LLMQuoterTest"])
+    cc_p.add_argument("--decompress", action="store_true")
+    _add_storage_args(cc_p, collection=None)
+    cc_p.set_defaults(handler=lambda a: compress_context(a.collections, a.connection, a.database, a.decompress))
+
+    exp_p = subparsers.add_parser("export", aliases=["export_scores"])
+    exp_p.add_argument("--path", default="scores.parquet")
+    _add_storage_args(exp_p)
+    exp_p.set_defaults(handler=lambda a: export_scores(a.path, a.collection, a.connection, a.database))
+
+    idx_p = subparsers.add_parser("indexes")
+    idx_p.add_argument("--hotpot-collection", default="HotPotQAQuotes", dest="hotpot_collection")
+    idx_p.add_argument("--explain-only", action="store_true", dest="explain_only")
+    _add_storage_args(idx_p)
+    idx_p.set_defaults(handler=lambda a: indexes(a.collection, a.hotpot_collection, a.connection, a.database, not a.explain_only))
+
+    sum_p = subparsers.add_parser("rebuild_summary")
+    _add_storage_args(sum_p)
+    sum_p.set_defaults(handler=_rebuild_summary)
+
     up = subparsers.add_parser("upload_hf")
     up.add_argument("--repo", default="yurifacanha/hotpotqa_quotes_extended")
     up.add_argument("--private", action="store_true")
+    up.set_defaults(handler=lambda a: upload_hf(a.repo, a.private))
+
     merge = subparsers.add_parser("merge_raft")
     merge.add_argument("--source", default="yurifacanha/RAFTquotes")
     merge.add_argument("--target", default="yurifacanha/RAFTTquotesExtended")
     merge.add_argument("--split", default="train")
     merge.add_argument("--num_samples", type=int, default=None)
     merge.add_argument("--no-push", action="store_true", dest="no_push")
+    merge.set_defaults(handler=lambda a: merge_raft(a.source, a.target, a.split, a.num_samples, not a.no_push))
+
     uuid_p = subparsers.add_parser("add_uuids")
     uuid_p.add_argument("--dataset", default="yurifacanha/RAFTTquotesExtended")
     uuid_p.add_argument("--splits", nargs="+", default=["train", "test"])
     uuid_p.add_argument("--no-push", action="store_true", dest="no_push")
+    uuid_p.set_defaults(handler=lambda a: add_uuids(a.dataset, a.splits, not a.no_push))
+
     mongo_p = subparsers.add_parser("save_to_mongo")
     mongo_p.add_argument("--dataset", default="yurifacanha/RAFTTquotesExtended")
     mongo_p.add_argument("--splits", nargs="+", default=["test"])
-    mongo_p.add_argument("--collection", default="LLMQuoterTest")
-    mongo_p.add_argument("--connection", default="mongodb://localhost:27017")
-    mongo_p.add_argument("--database", default="llmquoter")
+    mongo_p.add_argument("--compress-context", action="store_true", dest="compress_context")
+    _add_storage_args(mongo_p)
+    mongo_p.set_defaults(handler=lambda a: save_to_mongo(a.dataset, a.splits, a.collection, a.connection, a.database, a.compress_context))
+
     inf_p = subparsers.add_parser("update_inferences")
     inf_p.add_argument("--data_dir", default="data")
-    inf_p.add_argument("--collection", default="LLMQuoterTest")
-    inf_p.add_argument("--connection", default="mongodb://localhost:27017")
-    inf_p.add_argument("--database", default="llmquoter")
-    args = parser.parse_args()
-    if args.command == "upload_hf":
-        upload_hf(args.repo, args.private)
-    elif args.command == "merge_raft":
-        merge_raft(args.source, args.target, args.split, args.num_samples, not args.no_push)
-    elif args.command == "add_uuids":
-        add_uuids(args.dataset, args.splits, not args.no_push)
-    elif args.command == "save_to_mongo":
-        save_to_mongo(args.dataset, args.splits, args.collection, args.connection, args.database)
-    elif args.command == "update_inferences":
-        update_inferences(args.data_dir, args.collection, args.connection, args.database)
-    else:
+    _add_storage_args(inf_p)
+    inf_p.set_defaults(handler=lambda a: update_inferences(a.data_dir, a.collection, a.connection, a.database))
+
+    for sub in {id(p): p for p in subparsers.choices.values()}.values():
+        _add_profile_args(sub)
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, "handler", None):
         parser.print_help()
+        return
+    if not (args.profile or args.trace_memory):
+        args.handler(args)
+        return
+    from core.profiling import profiled_run
+    params = {k: v for k, v in vars(args).items() if k not in ("handler", "profile", "trace_memory", "runs_dir")}
+    with profiled_run(args.command, params, args.profile, args.trace_memory, args.runs_dir):
+        args.handler(args)
 
 
 if __name__ == "__main__":
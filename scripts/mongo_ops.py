@@ -1,12 +1,13 @@
 import json
 import random
 import uuid
+from datetime import datetime, timezone
 from pathlib import Path
 
 from datasets import load_dataset, Dataset, DatasetDict
-from pymongo import MongoClient
 
 from mongo import HotPotQAMongo, HotPotQADocument
+from storage import get_store
 
 
 CONVERSATION_INSTRUCTION = """Instruction: Given the question and the context provide relevant quotes from the context that support the answer. Your answer must be just the quotes, not the entire context.
@@ -123,7 +124,8 @@ def load_and_save_to_mongo(
     splits: list[str],
     collection_name: str,
     connection_string: str,
-    database_name: str
+    database_name: str,
+    compress_context: bool = False,
 ):
     dataset = load_dataset(dataset_name)
     documents = []
@@ -140,8 +142,11 @@ def load_and_save_to_mongo(
                 "uuid": doc.get("uuid") or str(uuid.uuid4()),
             }
             documents.append(record)
-    client = MongoClient(connection_string)
-    collection = client[database_name][collection_name]
+    store = get_store(connection_string, database_name)
+    if compress_context:
+        from storage.compression import ContextCompressor
+        ContextCompressor(store).compress_docs(documents)
+    collection = store.collection(collection_name)
     collection.create_index("uuid", unique=True)
     upserted = 0
     for record in documents:
@@ -150,7 +155,6 @@ def load_and_save_to_mongo(
             upserted += 1
         except Exception:
             pass
-    client.close()
     return upserted
 
 
@@ -164,8 +168,7 @@ def update_mongo_from_data_inferences(
     json_files = list(data_path.glob("*.json"))
     if not json_files:
         return
-    client = MongoClient(connection_string)
-    collection = client[database_name][collection_name]
+    collection = get_store(connection_string, database_name).collection(collection_name)
     for json_file in sorted(json_files):
         model_name = json_file.stem
         with open(json_file, "r", encoding="utf-8") as f:
@@ -173,6 +176,5 @@ def update_mongo_from_data_inferences(
         for doc_uuid, quotes in inferences_data.items():
             collection.update_one(
                 {"uuid": doc_uuid},
-                {"$set": {f"inferences.{model_name}": quotes}}
+                {"$set": {f"inferences.{model_name}": quotes, f"inferred_at.{model_name}": datetime.now(timezone.utc)}}
             )
-    client.close()
@@ -1,15 +1,27 @@
-from services.evaluator.mongo_eval import (
-    evaluate_from_llmquoter_test,
-    update_scores_manually,
-)
-from services.evaluator.aggregate import (
-    get_model_averages_llmquoter_test,
-    print_model_averages_llmquoter_test,
-)
-
-__all__ = [
-    "evaluate_from_llmquoter_test",
-    "update_scores_manually",
-    "get_model_averages_llmquoter_test",
-    "print_model_averages_llmquoter_test",
-]
+import importlib
+
+_EXPORTS = {
+    "evaluate_from_llmquoter_test": "services.evaluator.mongo_eval",
+    "update_scores_manually": "services.evaluator.mongo_eval",
+    "get_model_averages_llmquoter_test": "services.evaluator.aggregate",
+    "print_model_averages_llmquoter_test": "services.evaluator.aggregate",
+    "compare_models_llmquoter_test": "services.evaluator.aggregate",
+    "print_model_comparison_llmquoter_test": "services.evaluator.aggregate",
+    "rebuild_summary": "services.evaluator.summary",
+    "evaluate_progressive_llmquoter_test": "services.evaluator.progressive",
+    "export_scores_snapshot": "services.evaluator.snapshot",
+    "load_scores_snapshot": "services.evaluator.snapshot",
+    "run_evaluation_worker_llmquoter_test": "services.evaluator.worker",
+    "evaluate_grounding_llmquoter_test": "services.evaluator.grounding",
+    "print_grounding_averages_llmquoter_test": "services.evaluator.grounding",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
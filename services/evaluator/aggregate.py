@@ -1,4 +1,11 @@
-from pymongo import MongoClient
+import math
+
+import numpy as np
+
+from core.stats import DEFAULT_RESAMPLES, bootstrap_compare
+from storage import DEFAULT_CONNECTION, get_store
+
+METRICS = ["recall", "precision", "f1", "bm25", "format_score"]
 
 
 def get_model_averages_llmquoter_test(
@@ -6,12 +13,17 @@ def get_model_averages_llmquoter_test(
     collection_name: str,
     connection_string: str,
     database_name: str,
+    snapshot_path: str | None = None,
+    from_summary: bool = False,
 ) -> dict:
-    client = MongoClient(connection_string)
-    db = client[database_name]
-    collection = db[collection_name]
-    docs = list(collection.find({"scores": {"$exists": True}}, {"scores": 1}))
-    client.close()
+    if snapshot_path:
+        from services.evaluator.snapshot import get_model_averages_snapshot
+        return get_model_averages_snapshot(snapshot_path, model_name)
+    if from_summary:
+        from services.evaluator.summary import get_model_averages_summary
+        return get_model_averages_summary(model_name, collection_name, connection_string, database_name)
+    collection = get_store(connection_string, database_name).collection(collection_name)
+    docs = list(collection.find({"scores": {"$exists": True}}, {"scores": 1}).sort("uuid", 1))
     if not docs:
         return {}
     model_results = {}
@@ -52,12 +64,18 @@ def get_model_averages_llmquoter_test(
 def print_model_averages_llmquoter_test(
     model_name: str | None = None,
     collection_name: str = "LLMQuoterTest",
+    snapshot_path: str | None = None,
+    from_summary: bool = False,
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
 ) -> dict:
     averages = get_model_averages_llmquoter_test(
         model_name=model_name,
         collection_name=collection_name,
-        connection_string="mongodb://localhost:27017",
-        database_name="llmquoter",
+        connection_string=connection_string,
+        database_name=database_name,
+        snapshot_path=snapshot_path,
+        from_summary=from_summary,
     )
     if not averages:
         print("No results found.")
@@ -76,3 +94,113 @@ def print_model_averages_llmquoter_test(
         for mod_name, m in sorted(averages.items()):
             print(f"{mod_name:<20} {m['count']:<8} {m['avg_recall']:<10.4f} {m['avg_precision']:<10.4f} {m['avg_f1']:<10.4f} {m['avg_bm25']:<10.4f} {m['avg_format_score']:<10.4f}")
     return averages
+
+
+def get_score_matrix_llmquoter_test(
+    metric: str,
+    collection_name: str,
+    connection_string: str,
+    database_name: str,
+    snapshot_path: str | None = None,
+) -> tuple[list[str], list[str], np.ndarray]:
+    if snapshot_path:
+        from services.evaluator.snapshot import get_score_matrix_snapshot
+        return get_score_matrix_snapshot(snapshot_path, metric)
+    collection = get_store(connection_string, database_name).collection(collection_name)
+    docs = list(collection.find({"scores": {"$exists": True}}, {"uuid": 1, "scores": 1}).sort("uuid", 1))
+    uuids = [doc.get("uuid") for doc in docs]
+    models = sorted({mod_name for doc in docs for mod_name in doc.get("scores", {})})
+    model_idx = {mod_name: i for i, mod_name in enumerate(models)}
+    matrix = np.full((len(docs), len(models)), np.nan)
+    for row, doc in enumerate(docs):
+        for mod_name, metrics in doc.get("scores", {}).items():
+            if metrics:
+                matrix[row, model_idx[mod_name]] = max(0.0, metrics.get(metric) or 0.0)
+    return uuids, models, matrix
+
+
+def compare_models_llmquoter_test(
+    metric: str,
+    baseline_model: str | None,
+    collection_name: str,
+    connection_string: str,
+    database_name: str,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int | None = 0,
+    snapshot_path: str | None = None,
+) -> dict:
+    _, models, matrix = get_score_matrix_llmquoter_test(
+        metric, collection_name, connection_string, database_name, snapshot_path
+    )
+    if not models:
+        return {}
+    if baseline_model not in models:
+        with np.errstate(invalid="ignore"):
+            baseline_model = models[int(np.nanargmax(np.nanmean(matrix, axis=0)))]
+    base = models.index(baseline_model)
+    others = [i for i in range(len(models)) if i != base]
+    ci, paired = bootstrap_compare(
+        matrix, [(i, base) for i in others], resamples=resamples, confidence=confidence, seed=seed
+    )
+    results = {}
+    for i, mod_name in enumerate(models):
+        results[mod_name] = {
+            "mean": round(float(ci["mean"][i]), 4),
+            "ci_low": round(float(ci["low"][i]), 4),
+            "ci_high": round(float(ci["high"][i]), 4),
+            "count": int(ci["count"][i]),
+            "baseline": baseline_model,
+        }
+    for j, i in enumerate(others):
+        results[models[i]].update({
+            "diff": round(float(paired["diff"][j]), 4),
+            "diff_low": round(float(paired["low"][j]), 4),
+            "diff_high": round(float(paired["high"][j]), 4),
+            "p_bootstrap": round(float(paired["p_bootstrap"][j]), 4),
+            "p_permutation": round(float(paired["p_permutation"][j]), 4),
+            "paired_count": int(paired["count"][j]),
+        })
+    return results
+
+
+def _fmt(value: float, spec: str) -> str:
+    return "-" if math.isnan(value) else format(value, spec)
+
+
+def print_model_comparison_llmquoter_test(
+    metric: str = "f1",
+    baseline_model: str | None = None,
+    collection_name: str = "LLMQuoterTest",
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    snapshot_path: str | None = None,
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    results = compare_models_llmquoter_test(
+        metric=metric,
+        baseline_model=baseline_model,
+        collection_name=collection_name,
+        connection_string=connection_string,
+        database_name=database_name,
+        resamples=resamples,
+        confidence=confidence,
+        snapshot_path=snapshot_path,
+    )
+    if not results:
+        print("No results found.")
+        return {}
+    baseline = next(iter(results.values()))["baseline"]
+    pct = int(confidence * 100)
+    print(f"\n=== LLMQuoterTest {metric} {pct}% CI vs {baseline} ===")
+    print(f"{'Model':<20} {'Count':<8} {'Mean':<8} {'CI':<18} {'Diff':<8} {'Diff CI':<18} {'p(boot)':<8} {'p(perm)':<8} {'Paired':<8}")
+    print("-" * 110)
+    for mod_name, m in sorted(results.items(), key=lambda item: -item[1]["mean"]):
+        ci = f"[{m['ci_low']:.4f}, {m['ci_high']:.4f}]"
+        if "diff" in m:
+            diff_ci = f"[{_fmt(m['diff_low'], '+.4f')}, {_fmt(m['diff_high'], '+.4f')}]" if m["paired_count"] else "-"
+            print(f"{mod_name:<20} {m['count']:<8} {m['mean']:<8.4f} {ci:<18} {_fmt(m['diff'], '+.4f'):<8} {diff_ci:<18} {_fmt(m['p_bootstrap'], '.4f'):<8} {_fmt(m['p_permutation'], '.4f'):<8} {m['paired_count']:<8}")
+        else:
+            print(f"{mod_name:<20} {m['count']:<8} {m['mean']:<8.4f} {ci:<18} {'-':<8} {'-':<18} {'-':<8} {'-':<8} {'-':<8}")
+    return results
@@ -0,0 +1,164 @@
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from ai.batch import TERMINAL_STATUSES, BatchClient, OpenAIBatchClient, judge_request, parse_judge_response
+from services.evaluator.llm_eval import (
+    _fix_inconsistent_recall_precision,
+    compute_aggregate_metrics,
+    compute_bm25_aggregate,
+    save_score_output,
+    score_output,
+)
+from services.evaluator.summary import summary_collection_name
+from storage import DEFAULT_CONNECTION, get_store
+
+CUSTOM_ID_SEPARATOR = "::"
+MAX_REQUESTS_PER_BATCH = 50000
+
+
+def batch_custom_id(uuid_val: str, model_name: str) -> str:
+    return f"{uuid_val}{CUSTOM_ID_SEPARATOR}{model_name}"
+
+
+def split_custom_id(custom_id: str) -> tuple[str, str]:
+    uuid_val, model_name = custom_id.split(CUSTOM_ID_SEPARATOR, 1)
+    return uuid_val, model_name
+
+
+def write_batch_requests_llmquoter_test(
+    output_dir: str,
+    models: list[str] | None = None,
+    force: bool = False,
+    judge_model: str | None = None,
+    max_requests: int = MAX_REQUESTS_PER_BATCH,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> list[Path]:
+    collection = get_store(connection_string, database_name).collection(collection_name)
+    filter_query = {"quotes": {"$exists": True, "$ne": ""}, "inferences": {"$exists": True}}
+    projection = {"uuid": 1, "quotes": 1, "inferences": 1, "scores": 1}
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    directory = Path(output_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths, handle, written = [], None, 0
+    try:
+        for doc in collection.find(filter_query, projection):
+            uuid_val = doc.get("uuid")
+            if not uuid_val:
+                continue
+            scored = doc.get("scores", {})
+            for model_name, inference in sorted(doc.get("inferences", {}).items()):
+                if not inference or (models and model_name not in models):
+                    continue
+                if not force and scored.get(model_name):
+                    continue
+                if handle is None or written >= max_requests:
+                    if handle:
+                        handle.close()
+                    paths.append(directory / f"judge-{stamp}-{len(paths):03d}.jsonl")
+                    handle = open(paths[-1], "w", encoding="utf-8")
+                    written = 0
+                request = judge_request(batch_custom_id(uuid_val, model_name), doc["quotes"], inference, judge_model)
+                handle.write(json.dumps(request) + "\n")
+                written += 1
+    finally:
+        if handle:
+            handle.close()
+    return paths
+
+
+def wait_for_batch(client: BatchClient, batch_id: str, poll_interval: float = 30.0, timeout: float | None = None) -> dict:
+    start = time.monotonic()
+    while True:
+        info = client.status(batch_id)
+        print(f"Batch {batch_id}: {info['status']} ({info['completed']}/{info['total']} done, {info['failed']} failed)")
+        if info["status"] in TERMINAL_STATUSES:
+            return info
+        if timeout is not None and time.monotonic() - start > timeout:
+            raise TimeoutError(f"Batch {batch_id} still {info['status']} after {timeout:.0f}s")
+        time.sleep(poll_interval)
+
+
+def ingest_batch_results_llmquoter_test(
+    lines,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict[str, list[dict]]:
+    store = get_store(connection_string, database_name)
+    collection = store.collection(collection_name)
+    summary_collection = store.collection(summary_collection_name(collection_name))
+    results: dict[str, list[dict]] = {}
+    docs: dict[str, dict | None] = {}
+    for line in lines:
+        uuid_val, model_name = split_custom_id(line["custom_id"])
+        if uuid_val not in docs:
+            docs[uuid_val] = collection.find_one({"uuid": uuid_val}, {"quotes": 1, "inferences": 1})
+        doc = docs[uuid_val]
+        inference = (doc or {}).get("inferences", {}).get(model_name)
+        if not doc or not inference:
+            print(f"Skipping {line['custom_id']}: document or inference missing")
+            continue
+        sample = {"uuid": uuid_val, "ground_truth": doc.get("quotes", ""), "system_response": inference}
+        try:
+            judged = parse_judge_response(line)
+        except ValueError as e:
+            print(f"Invalid judge output for {line['custom_id']}: {e}")
+            judged = None
+        if judged:
+            judged = _fix_inconsistent_recall_precision(judged, sample["ground_truth"], sample["system_response"])
+        output = score_output(sample, judged)
+        if "error" not in output:
+            save_score_output(collection, summary_collection, "uuid", model_name, output)
+        results.setdefault(model_name, []).append(output)
+    return results
+
+
+def evaluate_batch_llmquoter_test(
+    models: list[str] | None = None,
+    force: bool = False,
+    output_dir: str = "batches",
+    batch_ids: list[str] | None = None,
+    client: BatchClient | None = None,
+    judge_model: str | None = None,
+    poll_interval: float = 30.0,
+    timeout: float | None = None,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    client = client or OpenAIBatchClient()
+    if not batch_ids:
+        paths = write_batch_requests_llmquoter_test(
+            output_dir, models, force, judge_model,
+            collection_name=collection_name,
+            connection_string=connection_string,
+            database_name=database_name,
+        )
+        if not paths:
+            print("No pending judge requests")
+            return {"batches": [], "models": {}}
+        batch_ids = []
+        for path in paths:
+            batch_id = client.submit(path, {"collection": collection_name})
+            print(f"Submitted {path} as batch {batch_id}")
+            batch_ids.append(batch_id)
+    results: dict[str, list[dict]] = {}
+    for batch_id in batch_ids:
+        info = wait_for_batch(client, batch_id, poll_interval, timeout)
+        if info["status"] != "completed":
+            print(f"Batch {batch_id} ended with status {info['status']}")
+        ingested = ingest_batch_results_llmquoter_test(
+            client.results(batch_id), collection_name, connection_string, database_name
+        )
+        for model_name, outputs in ingested.items():
+            results.setdefault(model_name, []).extend(outputs)
+    for model_name, outputs in sorted(results.items()):
+        llm_metrics = compute_aggregate_metrics(outputs)
+        bm25_metrics = compute_bm25_aggregate(outputs)
+        errors = sum(1 for o in outputs if o.get("error"))
+        print(f"{model_name}: R={llm_metrics['avg_recall']:.4f} P={llm_metrics['avg_precision']:.4f} F1={llm_metrics['avg_f1']:.4f} BM25={bm25_metrics['avg_bm25']:.4f} errors={errors}")
+    return {"batches": batch_ids, "models": {m: len(o) for m, o in results.items()}}
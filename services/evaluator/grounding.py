@@ -0,0 +1,104 @@
+from functools import partial
+
+from tqdm.contrib.concurrent import process_map
+
+from core.grounding import ContextIndex
+from storage import DEFAULT_CONNECTION, get_store
+from storage.compression import lazy_documents
+
+
+def _ground_document(doc: dict, max_edit_ratio: float) -> tuple[str, dict]:
+    index = ContextIndex(doc.get("context", ""))
+    grounding = {
+        model_name: index.score(response, max_edit_ratio)
+        for model_name, response in doc.get("inferences", {}).items()
+        if isinstance(response, str)
+    }
+    return doc["uuid"], grounding
+
+
+def evaluate_grounding_llmquoter_test(
+    models: list[str] | None = None,
+    force: bool = False,
+    max_edit_ratio: float = 0.1,
+    max_workers: int = 4,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    store = get_store(connection_string, database_name)
+    collection = store.collection(collection_name)
+    filter_query = {"context": {"$exists": True, "$ne": ""}, "inferences": {"$exists": True}}
+    projection = {"uuid": 1, "context": 1, "inferences": 1, "grounding": 1}
+    pending = []
+    for doc in lazy_documents(collection.find(filter_query, projection), store):
+        if not doc.get("uuid"):
+            continue
+        done = doc.get("grounding", {})
+        inferences = {
+            model_name: response
+            for model_name, response in doc.get("inferences", {}).items()
+            if isinstance(response, str) and response
+            and (not models or model_name in models)
+            and (force or model_name not in done)
+        }
+        if inferences:
+            pending.append({"uuid": doc["uuid"], "context": doc["context"], "inferences": inferences})
+    print(f"Grounding {len(pending)} documents from {collection_name}")
+    if pending:
+        results = process_map(
+            partial(_ground_document, max_edit_ratio=max_edit_ratio),
+            pending,
+            max_workers=max_workers,
+            chunksize=max(1, len(pending) // (max_workers * 8)),
+            desc="Grounding quotes",
+            unit="doc",
+        )
+        for uuid_val, grounding in results:
+            collection.update_one(
+                {"uuid": uuid_val},
+                {"$set": {f"grounding.{model_name}": value for model_name, value in grounding.items()}},
+            )
+    return print_grounding_averages_llmquoter_test(
+        collection_name=collection_name,
+        connection_string=connection_string,
+        database_name=database_name,
+    )
+
+
+def get_grounding_averages_llmquoter_test(
+    collection_name: str,
+    connection_string: str,
+    database_name: str,
+) -> dict:
+    collection = get_store(connection_string, database_name).collection(collection_name)
+    docs = list(collection.find({"grounding": {"$exists": True}}, {"grounding": 1}).sort("uuid", 1))
+    values = {}
+    for doc in docs:
+        for model_name, value in doc.get("grounding", {}).items():
+            values.setdefault(model_name, []).append(max(0.0, value or 0.0))
+    return {
+        model_name: {
+            "avg_grounding": round(sum(v) / len(v), 4),
+            "fully_grounded": round(sum(1 for x in v if x >= 1.0) / len(v), 4),
+            "count": len(v),
+        }
+        for model_name, v in values.items()
+    }
+
+
+def print_grounding_averages_llmquoter_test(
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    averages = get_grounding_averages_llmquoter_test(collection_name, connection_string, database_name)
+    if not averages:
+        print("No grounding results found.")
+        return {}
+    print(f"\n=== {collection_name} Grounding ===")
+    print(f"{'Model':<20} {'Count':<8} {'Grounding':<10} {'Fully':<10}")
+    print("-" * 50)
+    for mod_name, m in sorted(averages.items()):
+        print(f"{mod_name:<20} {m['count']:<8} {m['avg_grounding']:<10.4f} {m['fully_grounded']:<10.4f}")
+    return averages
@@ -1,11 +1,13 @@
+import time
 import traceback
 from tqdm import tqdm
 from tqdm.contrib.concurrent import thread_map
-from pymongo import MongoClient
 
 from core.quote_utils import parse_quotes, format_score
 from core.metrics import bm25_score, f1_score
 from ai.chains.evaluator import get_chain
+from services.evaluator.summary import summary_collection_name, write_score
+from storage import DEFAULT_CONNECTION, get_store
 
 
 def _fix_inconsistent_recall_precision(result: dict, ground_truth: str, system_response: str) -> dict:
@@ -70,6 +72,32 @@ def compute_bm25_aggregate(results: list[dict]) -> dict:
     }
 
 
+def score_output(sample: dict, result: dict | None, id_field: str = "uuid") -> dict:
+    output = {id_field: sample[id_field]}
+    if result:
+        output.update({
+            "recall": result["recall"],
+            "precision": result["precision"],
+            "f1": f1_score(result["precision"], result["recall"]),
+        })
+    else:
+        output["error"] = True
+    output["bm25"] = bm25_score(sample["ground_truth"], sample["system_response"])
+    output["format_score"] = format_score(sample["system_response"])
+    return output
+
+
+def save_score_output(collection, summary_collection, id_field: str, model_name: str, output: dict) -> bool:
+    score_result = {
+        "recall": output.get("recall"),
+        "precision": output.get("precision"),
+        "f1": output.get("f1"),
+        "bm25": output.get("bm25"),
+        "format_score": output.get("format_score", 0.0)
+    }
+    return write_score(collection, summary_collection, id_field, output[id_field], model_name, score_result)
+
+
 def evaluate_single_model(
     samples: list[dict],
     max_workers: int,
@@ -78,11 +106,16 @@ def evaluate_single_model(
     collection_name: str,
     id_field: str,
     verbose: bool,
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+    chain_factory=get_chain,
+    latencies: list[float] | None = None,
 ) -> list[dict]:
-    mongo_client = MongoClient("mongodb://localhost:27017")
-    mongo_collection = mongo_client["llmquoter"][collection_name]
+    store = get_store(connection_string, database_name)
+    mongo_collection = store.collection(collection_name)
+    summary_collection = store.collection(summary_collection_name(collection_name))
 
-    def _process(sample):
+    def _evaluate(sample):
         try:
             if save_to_mongo and model_name:
                 doc = mongo_collection.find_one(
@@ -91,33 +124,11 @@ def evaluate_single_model(
                 )
                 if doc and doc.get("scores", {}).get(model_name):
                     return {id_field: sample[id_field], "skipped": True}
-            chain = get_chain()
+            chain = chain_factory()
             result = evaluate_single(sample["ground_truth"], sample["system_response"], chain, verbose=verbose)
-            output = {id_field: sample[id_field]}
-            if result:
-                output.update({
-                    "recall": result["recall"],
-                    "precision": result["precision"],
-                    "f1": f1_score(result["precision"], result["recall"]),
-                })
-            else:
-                output["error"] = True
-            bm25 = bm25_score(sample["ground_truth"], sample["system_response"])
-            output["bm25"] = bm25
-            fmt = format_score(sample["system_response"])
-            output["format_score"] = fmt
+            output = score_output(sample, result, id_field)
             if save_to_mongo and model_name and "error" not in output:
-                score_result = {
-                    "recall": output.get("recall"),
-                    "precision": output.get("precision"),
-                    "f1": output.get("f1"),
-                    "bm25": output.get("bm25"),
-                    "format_score": output.get("format_score", 0.0)
-                }
-                if mongo_collection.update_one(
-                    {id_field: sample[id_field]},
-                    {"$set": {f"scores.{model_name}": score_result}}
-                ).matched_count > 0:
+                if save_score_output(mongo_collection, summary_collection, id_field, model_name, output):
                     print(f"Saved {sample[id_field][:8]}... [R:{output.get('recall'):.3f} P:{output.get('precision'):.3f} F1:{output.get('f1'):.3f} BM25:{output.get('bm25', 0.0):.3f} FMT:{output.get('format_score', 0.0):.2f}]")
             return output
         except Exception as e:
@@ -125,9 +136,16 @@ def evaluate_single_model(
             traceback.print_exc()
             return {id_field: sample.get(id_field), "error": True}
 
+    def _process(sample):
+        start = time.perf_counter()
+        try:
+            return _evaluate(sample)
+        finally:
+            if latencies is not None:
+                latencies.append(time.perf_counter() - start)
+
     if max_workers <= 1:
         results = list(tqdm(map(_process, samples), total=len(samples), desc="Evaluating quotes", unit="sample"))
     else:
         results = list(thread_map(_process, samples, max_workers=max_workers, desc="Evaluating quotes", unit="sample"))
-    mongo_client.close()
     return results
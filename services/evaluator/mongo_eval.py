@@ -1,5 +1,4 @@
-from pymongo import MongoClient
-
+from core.profiling import DEFAULT_RUNS_DIR, profiled_run
 from core.metrics import bm25_score, f1_score
 from core.quote_utils import format_score
 from services.evaluator.llm_eval import (
@@ -7,6 +6,8 @@ from services.evaluator.llm_eval import (
     compute_aggregate_metrics,
     compute_bm25_aggregate,
 )
+from services.evaluator.summary import summary_collection_name, write_score
+from storage import DEFAULT_CONNECTION, get_store
 
 
 def evaluate_from_llmquoter_test(
@@ -16,18 +17,43 @@ def evaluate_from_llmquoter_test(
     verbose: bool | None = None,
     max_workers: int = 5,
     collection_name: str = "LLMQuoterTest",
-    connection_string: str = "mongodb://localhost:27017",
+    connection_string: str = DEFAULT_CONNECTION,
     database_name: str = "llmquoter",
+    profile: bool | str = False,
+    trace_memory: bool = False,
+    runs_dir: str = DEFAULT_RUNS_DIR,
+) -> dict:
+    params = {
+        "models": models,
+        "uuid": uuid,
+        "force": force,
+        "max_workers": max_workers,
+        "collection_name": collection_name,
+        "connection_string": connection_string,
+        "database_name": database_name,
+    }
+    with profiled_run("evaluate", params, profile, trace_memory, runs_dir):
+        return _evaluate_from_llmquoter_test(
+            models, uuid, force, verbose, max_workers, collection_name, connection_string, database_name
+        )
+
+
+def _evaluate_from_llmquoter_test(
+    models: list[str] | None,
+    uuid: str | None,
+    force: bool,
+    verbose: bool | None,
+    max_workers: int,
+    collection_name: str,
+    connection_string: str,
+    database_name: str,
 ) -> dict:
-    client = MongoClient(connection_string)
-    db = client[database_name]
-    collection = db[collection_name]
+    collection = get_store(connection_string, database_name).collection(collection_name)
     filter_query = {"quotes": {"$exists": True, "$ne": ""}, "inferences": {"$exists": True}}
     if uuid:
         filter_query["uuid"] = uuid
         print(f"Filtering to single document: {uuid}")
     docs = list(collection.find(filter_query))
-    client.close()
     print(f"Loaded {len(docs)} documents from {collection_name}")
     if not docs:
         return {"models": {}, "count": 0}
@@ -70,6 +96,8 @@ def evaluate_from_llmquoter_test(
             collection_name=collection_name,
             id_field="uuid",
             verbose=verbose_prompts,
+            connection_string=connection_string,
+            database_name=database_name,
         )
         llm_metrics = compute_aggregate_metrics(results)
         bm25_metrics = compute_bm25_aggregate(results)
@@ -82,11 +110,11 @@ def evaluate_from_llmquoter_test(
 def update_scores_manually(
     manual_scores: list[dict],
     collection_name: str = "LLMQuoterTest",
-    connection_string: str = "mongodb://localhost:27017",
+    connection_string: str = DEFAULT_CONNECTION,
     database_name: str = "llmquoter",
 ) -> int:
-    client = MongoClient(connection_string)
-    collection = client[database_name][collection_name]
+    collection = get_store(connection_string, database_name).collection(collection_name)
+    summary = get_store(connection_string, database_name).collection(summary_collection_name(collection_name))
     updated = 0
     for item in manual_scores:
         uuid_val = item.get("uuid")
@@ -112,13 +140,8 @@ def update_scores_manually(
             "bm25": bm25,
             "format_score": fmt
         }
-        result = collection.update_one(
-            {"uuid": uuid_val},
-            {"$set": {f"scores.{model_name}": score_result}}
-        )
-        if result.modified_count > 0 or result.matched_count > 0:
+        if write_score(collection, summary, "uuid", uuid_val, model_name, score_result):
             updated += 1
             print(f"Manual update {uuid_val[:8]}... {model_name} [R:{recall} P:{precision} F1:{f1:.3f} BM25:{bm25} FMT:{fmt}]")
-    client.close()
     print(f"Updated {updated} documents with manual scores")
     return updated
@@ -0,0 +1,160 @@
+import math
+import random
+from statistics import NormalDist
+
+from services.evaluator.llm_eval import evaluate_single_model
+from storage import DEFAULT_CONNECTION, get_store
+from storage.compression import lazy_documents
+
+
+def _context_length_edges(lengths: list[int], n_strata: int) -> list[int]:
+    ordered = sorted(lengths)
+    return [ordered[len(ordered) * i // n_strata] for i in range(1, n_strata)]
+
+
+def _stratum(doc: dict, stratify_by: str | None, edges: list[int]) -> str:
+    if stratify_by == "level":
+        return doc["level"]
+    if stratify_by == "context_length":
+        length = len(doc.get("context") or "")
+        bucket = sum(length >= e for e in edges)
+        return f"ctx<{edges[bucket]}" if bucket < len(edges) else f"ctx>={edges[-1]}" if edges else "all"
+    return "all"
+
+
+def stratified_estimate(strata: dict, confidence: float) -> dict:
+    total = sum(s["size"] for s in strata.values())
+    mean, variance, ready = 0.0, 0.0, True
+    for s in strata.values():
+        n = len(s["values"])
+        if n < min(2, s["size"]):
+            ready = False
+        if n == 0:
+            continue
+        weight = s["size"] / total
+        m = sum(s["values"]) / n
+        mean += weight * m
+        if 2 <= n < s["size"]:
+            var = sum((v - m) ** 2 for v in s["values"]) / (n - 1)
+            variance += weight ** 2 * var / n * (1 - n / s["size"])
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(variance) if ready else math.inf
+    return {
+        "estimate": round(mean, 4),
+        "ci_low": round(mean - half_width, 4) if ready else None,
+        "ci_high": round(mean + half_width, 4) if ready else None,
+        "width": round(2 * half_width, 4) if ready else math.inf,
+        "observed": sum(len(s["values"]) for s in strata.values()),
+    }
+
+
+def _next_batch(strata: dict, batch_size: int) -> list[dict]:
+    batch = []
+    planned = {name: len(s["values"]) for name, s in strata.items()}
+    while len(batch) < batch_size:
+        open_strata = [name for name, s in strata.items() if s["pending"]]
+        if not open_strata:
+            break
+        name = min(open_strata, key=lambda n: planned[n] / strata[n]["size"])
+        batch.append(strata[name]["pending"].pop())
+        planned[name] += 1
+    return batch
+
+
+def evaluate_progressive_llmquoter_test(
+    model_name: str,
+    metric: str = "f1",
+    stratify_by: str | None = "context_length",
+    n_strata: int = 4,
+    target_ci_width: float = 0.05,
+    min_samples: int = 30,
+    budget: int | None = None,
+    batch_size: int = 20,
+    confidence: float = 0.95,
+    seed: int = 0,
+    max_workers: int = 5,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    store = get_store(connection_string, database_name)
+    collection = store.collection(collection_name)
+    filter_query = {"quotes": {"$exists": True, "$ne": ""}, f"inferences.{model_name}": {"$exists": True}}
+    projection = {"uuid": 1, "quotes": 1, "level": 1, f"inferences.{model_name}": 1, f"scores.{model_name}": 1}
+    if stratify_by == "context_length":
+        projection["context"] = 1
+    docs = [
+        doc for doc in lazy_documents(collection.find(filter_query, projection), store)
+        if doc.get("uuid") and doc.get("inferences", {}).get(model_name)
+    ]
+    if not docs:
+        print(f"No samples for {model_name}")
+        return {}
+    if stratify_by == "level":
+        missing = sum(1 for d in docs if not d.get("level"))
+        if missing:
+            raise ValueError(
+                f"--stratify level needs a 'level' field, missing on {missing}/{len(docs)} documents in {collection_name}; "
+                "use --stratify context_length or none"
+            )
+    edges = _context_length_edges([len(d.get("context") or "") for d in docs], n_strata) if stratify_by == "context_length" else []
+    rng = random.Random(seed)
+    strata = {}
+    for doc in docs:
+        name = _stratum(doc, stratify_by, edges)
+        s = strata.setdefault(name, {"size": 0, "values": [], "pending": []})
+        s["size"] += 1
+        scores = doc.get("scores", {}).get(model_name)
+        if scores:
+            s["values"].append(max(0.0, scores.get(metric) or 0.0))
+        else:
+            s["pending"].append({
+                "uuid": doc["uuid"],
+                "ground_truth": doc["quotes"],
+                "system_response": doc["inferences"][model_name],
+                "stratum": name,
+            })
+    for s in strata.values():
+        rng.shuffle(s["pending"])
+    print(f"{model_name}: {len(docs)} samples in {len(strata)} strata, {sum(len(s['values']) for s in strata.values())} already scored")
+    judged = 0
+    while True:
+        result = stratified_estimate(strata, confidence)
+        ci = f"[{result['ci_low']:.4f}, {result['ci_high']:.4f}]" if result["ci_low"] is not None else "[-, -]"
+        print(f"{model_name} {metric}: {result['estimate']:.4f} {ci} n={result['observed']}/{len(docs)} judged={judged}")
+        if result["width"] <= target_ci_width and result["observed"] >= min_samples:
+            stopped = "target_ci_width"
+            break
+        if budget is not None and judged >= budget:
+            stopped = "budget"
+            break
+        batch = _next_batch(strata, batch_size if budget is None else min(batch_size, budget - judged))
+        if not batch:
+            stopped = "exhausted"
+            break
+        stratum_of = {sample["uuid"]: sample["stratum"] for sample in batch}
+        results = evaluate_single_model(
+            batch,
+            max_workers=max_workers,
+            model_name=model_name,
+            save_to_mongo=True,
+            collection_name=collection_name,
+            id_field="uuid",
+            verbose=False,
+            connection_string=connection_string,
+            database_name=database_name,
+        )
+        judged += len(batch)
+        for r in results:
+            if r.get("error") or r.get("skipped") or r.get(metric) is None:
+                continue
+            strata[stratum_of[r["uuid"]]]["values"].append(max(0.0, r[metric]))
+    result.update({
+        "model": model_name,
+        "metric": metric,
+        "population": len(docs),
+        "judged": judged,
+        "stopped": stopped,
+        "strata": {name: {"size": s["size"], "observed": len(s["values"])} for name, s in strata.items()},
+    })
+    print(f"Stopped on {stopped}")
+    return result
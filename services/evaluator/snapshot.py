@@ -0,0 +1,103 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from services.evaluator.aggregate import METRICS
+from storage import DEFAULT_CONNECTION, get_store
+
+SNAPSHOT_SCHEMA = pa.schema(
+    [("uuid", pa.string()), ("model", pa.string())]
+    + [(metric, pa.float64()) for metric in METRICS]
+    + [("grounding", pa.float64())]
+)
+BATCH_ROWS = 50_000
+
+
+def _empty_rows() -> dict[str, list]:
+    return {name: [] for name in SNAPSHOT_SCHEMA.names}
+
+
+def export_scores_snapshot(
+    path: str,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+    batch_rows: int = BATCH_ROWS,
+) -> int:
+    collection = get_store(connection_string, database_name).collection(collection_name)
+    cursor = collection.find(
+        {"scores": {"$exists": True}}, {"uuid": 1, "scores": 1, "grounding": 1}
+    ).sort("uuid", 1).batch_size(1000)
+    total = 0
+    rows = _empty_rows()
+    with pq.ParquetWriter(path, SNAPSHOT_SCHEMA, compression="zstd") as writer:
+        for doc in cursor:
+            grounding = doc.get("grounding", {})
+            for mod_name, metrics in (doc.get("scores") or {}).items():
+                if not metrics:
+                    continue
+                rows["uuid"].append(doc.get("uuid"))
+                rows["model"].append(mod_name)
+                for metric in METRICS:
+                    rows[metric].append(metrics.get(metric))
+                rows["grounding"].append(grounding.get(mod_name))
+            if len(rows["uuid"]) >= batch_rows:
+                writer.write_table(pa.Table.from_pydict(rows, SNAPSHOT_SCHEMA))
+                total += len(rows["uuid"])
+                rows = _empty_rows()
+        if rows["uuid"]:
+            writer.write_table(pa.Table.from_pydict(rows, SNAPSHOT_SCHEMA))
+            total += len(rows["uuid"])
+    print(f"Exported {total} scores from {collection_name} to {path}")
+    return total
+
+
+def load_scores_snapshot(
+    path: str,
+    models: list[str] | None = None,
+    uuids: list[str] | None = None,
+    columns: list[str] | None = None,
+) -> pa.Table:
+    filters = []
+    if models:
+        filters.append(("model", "in", models))
+    if uuids:
+        filters.append(("uuid", "in", uuids))
+    return pq.read_table(path, columns=columns, filters=filters or None, memory_map=True)
+
+
+def _clean(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    return pc.max_element_wise(pc.fill_null(column, 0.0), 0.0)
+
+
+def get_model_averages_snapshot(path: str, model_name: str | None = None) -> dict:
+    table = load_scores_snapshot(
+        path, models=[model_name] if model_name else None, columns=["model"] + METRICS
+    )
+    if table.num_rows == 0:
+        return {}
+    cleaned = pa.table({"model": table["model"], **{m: _clean(table[m]) for m in METRICS}})
+    grouped = cleaned.group_by("model").aggregate(
+        [(m, "mean") for m in METRICS] + [("model", "count")]
+    ).to_pydict()
+    averages = {}
+    for i, mod_name in enumerate(grouped["model"]):
+        averages[mod_name] = {f"avg_{m}": round(grouped[f"{m}_mean"][i], 4) for m in METRICS}
+        averages[mod_name]["count"] = grouped["model_count"][i]
+    return averages
+
+
+def get_score_matrix_snapshot(path: str, metric: str) -> tuple[list[str], list[str], np.ndarray]:
+    table = load_scores_snapshot(path, columns=["uuid", "model", metric])
+    uuid_codes = pc.dictionary_encode(table["uuid"]).combine_chunks()
+    model_codes = pc.dictionary_encode(table["model"]).combine_chunks()
+    uuids = uuid_codes.dictionary.to_pylist()
+    models = model_codes.dictionary.to_pylist()
+    order = np.argsort(models)
+    remap = np.empty(len(models), dtype=np.int64)
+    remap[order] = np.arange(len(models))
+    matrix = np.full((len(uuids), len(models)), np.nan)
+    values = _clean(table[metric]).to_numpy()
+    matrix[uuid_codes.indices.to_numpy(), remap[model_codes.indices.to_numpy()]] = values
+    return uuids, sorted(models), matrix
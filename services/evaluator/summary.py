@@ -0,0 +1,135 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+from services.evaluator.aggregate import METRICS
+from storage import DEFAULT_CONNECTION, get_store
+
+HISTOGRAM_BINS = 10
+SUMMARY_META_ID = "_meta"
+
+
+def summary_collection_name(collection_name: str) -> str:
+    return f"{collection_name}Summary"
+
+
+def _clean(value) -> float:
+    return max(0.0, value or 0.0)
+
+
+def _bin(value: float) -> int:
+    return min(HISTOGRAM_BINS - 1, int(min(1.0, value) * HISTOGRAM_BINS))
+
+
+def _is_counter(key: str) -> bool:
+    return key == "count" or key.startswith("hist.")
+
+
+def _nest(flat: dict) -> dict:
+    nested = {}
+    for key, value in flat.items():
+        node = nested
+        parts = key.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = int(value) if _is_counter(key) else value
+    return nested
+
+
+def summary_delta(new: dict | None, old: dict | None) -> dict:
+    inc = defaultdict(float)
+    for sign, metrics in ((1, new), (-1, old)):
+        if not metrics:
+            continue
+        inc["count"] += sign
+        for metric in METRICS:
+            value = _clean(metrics.get(metric))
+            inc[f"sum.{metric}"] += sign * value
+            inc[f"sumsq.{metric}"] += sign * value * value
+            inc[f"hist.{metric}.{_bin(value)}"] += sign
+    return {
+        key: int(value) if _is_counter(key) else value
+        for key, value in inc.items()
+        if value != 0
+    }
+
+
+def apply_score_change(summary: Collection, model_name: str, new: dict | None, old: dict | None) -> None:
+    inc = summary_delta(new, old)
+    if inc:
+        summary.update_one({"_id": model_name}, {"$inc": inc}, upsert=True)
+
+
+def write_score(
+    collection: Collection,
+    summary: Collection,
+    id_field: str,
+    id_value: str,
+    model_name: str,
+    score_result: dict,
+) -> bool:
+    before = collection.find_one_and_update(
+        {id_field: id_value},
+        {"$set": {f"scores.{model_name}": score_result}},
+        projection={f"scores.{model_name}": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if before is None:
+        return False
+    old = (before.get("scores") or {}).get(model_name)
+    apply_score_change(summary, model_name, score_result, old)
+    return True
+
+
+def rebuild_summary(
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> int:
+    store = get_store(connection_string, database_name)
+    totals = defaultdict(lambda: defaultdict(float))
+    for doc in store[collection_name].find({"scores": {"$exists": True}}, {"scores": 1}).sort("uuid", 1):
+        for mod_name, metrics in (doc.get("scores") or {}).items():
+            for key, value in summary_delta(metrics, None).items():
+                totals[mod_name][key] += value
+    summary_name = summary_collection_name(collection_name)
+    staging = store[f"{summary_name}_rebuild"]
+    staging.drop()
+    staging.insert_many([
+        {"_id": SUMMARY_META_ID, "rebuilt_at": datetime.now(timezone.utc)},
+        *({"_id": mod_name, **_nest(values)} for mod_name, values in totals.items()),
+    ])
+    staging.rename(summary_name, dropTarget=True)
+    print(f"Rebuilt {summary_name} for {len(totals)} models")
+    return len(totals)
+
+
+def get_model_averages_summary(
+    model_name: str | None,
+    collection_name: str,
+    connection_string: str,
+    database_name: str,
+) -> dict:
+    summary = get_store(connection_string, database_name).collection(summary_collection_name(collection_name))
+    if summary.find_one({"_id": SUMMARY_META_ID}) is None:
+        print(f"{summary_collection_name(collection_name)} has never been seeded from existing scores; rebuilding it")
+        rebuild_summary(collection_name, connection_string, database_name)
+    docs = list(summary.find({"_id": model_name} if model_name else {"_id": {"$ne": SUMMARY_META_ID}}))
+    averages = {}
+    for doc in docs:
+        count = doc.get("count", 0)
+        if count <= 0:
+            continue
+        m = {}
+        for metric in METRICS:
+            mean = doc.get("sum", {}).get(metric, 0.0) / count
+            variance = max(0.0, doc.get("sumsq", {}).get(metric, 0.0) / count - mean * mean)
+            m[f"avg_{metric}"] = round(mean, 4)
+            m[f"std_{metric}"] = round(math.sqrt(variance), 4)
+            m[f"hist_{metric}"] = [doc.get("hist", {}).get(metric, {}).get(str(b), 0) for b in range(HISTOGRAM_BINS)]
+        m["count"] = count
+        averages[doc["_id"]] = m
+    return averages
@@ -0,0 +1,283 @@
+import queue
+import signal
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from ai.chains.evaluator import get_chain
+from services.evaluator.llm_eval import evaluate_single_model
+from storage import DEFAULT_CONNECTION, get_store
+
+WATCHED_OPERATIONS = ["insert", "update", "replace"]
+
+
+def _utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _pending_samples(doc: dict, models: list[str] | None, detected_at: datetime) -> list[dict]:
+    uuid_val, ground_truth = doc.get("uuid"), doc.get("quotes")
+    if not uuid_val or not ground_truth:
+        return []
+    scored = doc.get("scores") or {}
+    inferred_at = doc.get("inferred_at") or {}
+    return [
+        {
+            "uuid": uuid_val,
+            "model": model_name,
+            "ground_truth": ground_truth,
+            "system_response": inference,
+            "since": _utc(inferred_at.get(model_name)) or detected_at,
+        }
+        for model_name, inference in (doc.get("inferences") or {}).items()
+        if inference and not scored.get(model_name) and (not models or model_name in models)
+    ]
+
+
+class EvaluationWorker:
+
+    def __init__(
+        self,
+        models: list[str] | None = None,
+        batch_size: int = 50,
+        max_workers: int = 5,
+        flush_interval: float = 2.0,
+        poll_interval: float = 5.0,
+        use_change_stream: bool = True,
+        collection_name: str = "LLMQuoterTest",
+        connection_string: str = DEFAULT_CONNECTION,
+        database_name: str = "llmquoter",
+        chain_factory=get_chain,
+        max_retries: int = 3,
+        retry_backoff: float = 30.0,
+    ):
+        self.models = models
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self.use_change_stream = use_change_stream
+        self.collection_name = collection_name
+        self.connection_string = connection_string
+        self.database_name = database_name
+        self.chain_factory = chain_factory
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.collection = get_store(connection_string, database_name).collection(collection_name)
+        self.queue: queue.Queue[dict] = queue.Queue()
+        self.pending: set[tuple[str, str]] = set()
+        self.retries: dict[tuple[str, str], dict] = {}
+        self.exhausted: dict[tuple[str, str], str] = {}
+        self.pending_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.mode = "polling"
+        self.stats = {"scored": 0, "failed": 0, "batches": 0, "gave_up": 0, "lags": deque(maxlen=1000)}
+
+    def stop(self, *_):
+        if not self.stop_event.is_set():
+            print("Stopping worker after the current batch...")
+        self.stop_event.set()
+
+    def _enqueue(self, samples: list[dict]) -> int:
+        added = 0
+        with self.pending_lock:
+            for sample in samples:
+                key = (sample["uuid"], sample["model"])
+                if key in self.exhausted and self.exhausted[key] == sample["system_response"]:
+                    continue
+                self.exhausted.pop(key, None)
+                if key not in self.pending and key not in self.retries:
+                    self.pending.add(key)
+                    self.queue.put(sample)
+                    added += 1
+        return added
+
+    def _schedule_retry(self, sample: dict):
+        key = (sample["uuid"], sample["model"])
+        attempts = self.retries.get(key, {}).get("attempts", 0) + 1
+        if attempts > self.max_retries:
+            self.retries.pop(key, None)
+            self.exhausted[key] = sample["system_response"]
+            self.stats["gave_up"] += 1
+            print(f"Giving up on {key[0]} / {key[1]} after {attempts} failed judge calls")
+            return
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        self.retries[key] = {"sample": sample, "attempts": attempts, "retry_at": time.monotonic() + delay}
+
+    def _requeue_due(self) -> int:
+        now = time.monotonic()
+        with self.pending_lock:
+            due = [key for key, retry in self.retries.items() if retry["retry_at"] <= now]
+            for key in due:
+                self.pending.add(key)
+                self.queue.put(self.retries[key]["sample"])
+        return len(due)
+
+    def scan(self) -> int:
+        filter_query = {"quotes": {"$exists": True, "$ne": ""}, "inferences": {"$exists": True}}
+        projection = {"uuid": 1, "quotes": 1, "inferences": 1, "scores": 1, "inferred_at": 1}
+        now = datetime.now(timezone.utc)
+        added = 0
+        for doc in self.collection.find(filter_query, projection):
+            added += self._enqueue(_pending_samples(doc, self.models, now))
+        return added
+
+    def _watch(self) -> bool:
+        pipeline = [{"$match": {"operationType": {"$in": WATCHED_OPERATIONS}}}]
+        try:
+            stream = self.collection.watch(pipeline, full_document="updateLookup", max_await_time_ms=1000)
+        except (OperationFailure, NotImplementedError, AttributeError, TypeError) as e:
+            print(f"Change streams unavailable ({e}); polling every {self.poll_interval:.1f}s")
+            return False
+        self.mode = "change_stream"
+        print("Watching change stream for new inferences")
+        with stream:
+            self.scan()
+            while not self.stop_event.is_set():
+                change = stream.try_next()
+                if change is None:
+                    continue
+                updated = (change.get("updateDescription") or {}).get("updatedFields") or {}
+                if change["operationType"] == "update" and not any(k.startswith("inferences") for k in updated):
+                    continue
+                doc = change.get("fullDocument")
+                if doc:
+                    self._enqueue(_pending_samples(doc, self.models, datetime.now(timezone.utc)))
+        return True
+
+    def _poll(self):
+        while not self.stop_event.is_set():
+            try:
+                self.scan()
+            except PyMongoError as e:
+                print(f"Polling failed: {e}")
+            self.stop_event.wait(self.poll_interval)
+
+    def _produce(self):
+        try:
+            if self.use_change_stream and self._watch():
+                return
+        except PyMongoError as e:
+            print(f"Change stream failed ({e}); falling back to polling")
+        self.mode = "polling"
+        self._poll()
+
+    def _next_batch(self) -> list[dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self.stop_event.is_set():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _score(self, batch: list[dict]):
+        by_model: dict[str, list[dict]] = {}
+        for sample in batch:
+            by_model.setdefault(sample["model"], []).append(sample)
+        for model_name, samples in by_model.items():
+            results = evaluate_single_model(
+                samples,
+                max_workers=self.max_workers,
+                model_name=model_name,
+                save_to_mongo=True,
+                collection_name=self.collection_name,
+                id_field="uuid",
+                verbose=False,
+                connection_string=self.connection_string,
+                database_name=self.database_name,
+                chain_factory=self.chain_factory,
+            )
+            done_at = datetime.now(timezone.utc)
+            by_uuid = {s["uuid"]: s for s in samples}
+            with self.pending_lock:
+                for result in results:
+                    sample = by_uuid[result["uuid"]]
+                    if result.get("error"):
+                        self.stats["failed"] += 1
+                        self._schedule_retry(sample)
+                        continue
+                    self.retries.pop((sample["uuid"], model_name), None)
+                    if not result.get("skipped"):
+                        self.stats["scored"] += 1
+                        self.stats["lags"].append((done_at - sample["since"]).total_seconds())
+                for sample in samples:
+                    self.pending.discard((sample["uuid"], model_name))
+        self.stats["batches"] += 1
+
+    def report(self) -> dict:
+        lags = list(self.stats["lags"])
+        metrics = {
+            "mode": self.mode,
+            "scored": self.stats["scored"],
+            "failed": self.stats["failed"],
+            "batches": self.stats["batches"],
+            "retrying": len(self.retries),
+            "gave_up": self.stats["gave_up"],
+            "queued": self.queue.qsize(),
+            "lag_p50": round(_percentile(lags, 0.5), 3),
+            "lag_p95": round(_percentile(lags, 0.95), 3),
+            "lag_max": round(max(lags), 3) if lags else 0.0,
+        }
+        print(f"[worker] mode={metrics['mode']} scored={metrics['scored']} failed={metrics['failed']} retrying={metrics['retrying']} gave_up={metrics['gave_up']} queued={metrics['queued']} lag p50={metrics['lag_p50']:.2f}s p95={metrics['lag_p95']:.2f}s max={metrics['lag_max']:.2f}s")
+        return metrics
+
+    def run(self, max_batches: int | None = None, idle_exit: float | None = None) -> dict:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        producer = threading.Thread(target=self._produce, daemon=True)
+        producer.start()
+        idle_since = time.monotonic()
+        while not self.stop_event.is_set():
+            self._requeue_due()
+            batch = self._next_batch()
+            if not batch:
+                if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                    break
+                continue
+            self._score(batch)
+            self.report()
+            idle_since = time.monotonic()
+            if max_batches and self.stats["batches"] >= max_batches:
+                break
+        self.stop_event.set()
+        producer.join(timeout=self.poll_interval + 2)
+        return self.report()
+
+
+def run_evaluation_worker_llmquoter_test(
+    models: list[str] | None = None,
+    batch_size: int = 50,
+    max_workers: int = 5,
+    flush_interval: float = 2.0,
+    poll_interval: float = 5.0,
+    use_change_stream: bool = True,
+    max_batches: int | None = None,
+    idle_exit: float | None = None,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+    chain_factory=get_chain,
+    max_retries: int = 3,
+    retry_backoff: float = 30.0,
+) -> dict:
+    worker = EvaluationWorker(
+        models, batch_size, max_workers, flush_interval, poll_interval, use_change_stream,
+        collection_name, connection_string, database_name, chain_factory, max_retries, retry_backoff,
+    )
+    return worker.run(max_batches, idle_exit)
@@ -0,0 +1,16 @@
+import importlib
+
+_EXPORTS = {
+    "run_inference_llmquoter_test": "services.inference.chunked",
+    "compare_inference_latency_llmquoter_test": "services.inference.chunked",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
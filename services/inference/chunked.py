@@ -0,0 +1,139 @@
+import statistics
+import time
+from datetime import datetime, timezone
+
+from tqdm.contrib.concurrent import thread_map
+
+from ai.chains.inference import get_chain, invoke_chunked
+from core.chunking import CHUNK_WORDS, OVERLAP_WORDS, split_context
+from core.quote_utils import parse_quotes
+from storage import DEFAULT_CONNECTION, get_store
+from storage.compression import lazy_documents
+
+
+FIELD_NAME_REPLACEMENTS = str.maketrans({".": "_", "$": "_", ":": "-"})
+
+
+def inference_field_name(name: str) -> str:
+    return name.translate(FIELD_NAME_REPLACEMENTS)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _load_docs(store, collection, uuid: str | None, limit: int | None, skip_model: str | None) -> list[dict]:
+    filter_query = {"context": {"$exists": True, "$ne": ""}, "question": {"$exists": True}}
+    if uuid:
+        filter_query["uuid"] = uuid
+    if skip_model:
+        filter_query[f"inferences.{skip_model}"] = {"$exists": False}
+    cursor = collection.find(filter_query, {"uuid": 1, "question": 1, "context": 1})
+    if limit:
+        cursor = cursor.limit(limit)
+    return [doc for doc in lazy_documents(cursor, store) if doc.get("uuid")]
+
+
+def _timed(fn) -> tuple[str | None, float]:
+    start = time.perf_counter()
+    try:
+        output = fn()
+    except Exception as e:
+        print(f"Inference failed: {e}")
+        output = None
+    return output, time.perf_counter() - start
+
+
+def run_inference_llmquoter_test(
+    model_name: str,
+    chunked: bool = True,
+    inference_name: str | None = None,
+    uuid: str | None = None,
+    limit: int | None = None,
+    force: bool = False,
+    chunk_words: int = CHUNK_WORDS,
+    overlap_words: int = OVERLAP_WORDS,
+    max_concurrency: int = 4,
+    max_workers: int = 1,
+    temperature: float = 0,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    name = inference_field_name(inference_name or (f"{model_name}-chunked" if chunked else model_name))
+    store = get_store(connection_string, database_name)
+    collection = store.collection(collection_name)
+    docs = _load_docs(store, collection, uuid, limit, None if force else name)
+    print(f"Running {'chunked' if chunked else 'single-shot'} inference for {len(docs)} documents as {name}")
+    chain = get_chain(model_name, temperature)
+
+    def _process(doc):
+        if chunked:
+            fn = lambda: invoke_chunked(chain, doc["question"], doc["context"], chunk_words, overlap_words, max_concurrency)
+        else:
+            fn = lambda: chain.invoke({"question": doc["question"], "context": doc["context"]}).content
+        output, seconds = _timed(fn)
+        if output is not None:
+            collection.update_one(
+                {"uuid": doc["uuid"]},
+                {"$set": {
+                    f"inferences.{name}": output,
+                    f"inference_times.{name}": round(seconds, 4),
+                    f"inferred_at.{name}": datetime.now(timezone.utc),
+                }},
+            )
+        return seconds if output is not None else None
+
+    latencies = [s for s in thread_map(_process, docs, max_workers=max_workers, desc="Inferring quotes", unit="doc") if s is not None]
+    if latencies:
+        print(f"{name}: {len(latencies)} docs, mean {statistics.fmean(latencies):.3f}s, p50 {_percentile(latencies, 0.5):.3f}s, p95 {_percentile(latencies, 0.95):.3f}s")
+    return {"name": name, "count": len(latencies), "failed": len(docs) - len(latencies)}
+
+
+def compare_inference_latency_llmquoter_test(
+    model_name: str,
+    uuid: str | None = None,
+    limit: int | None = 20,
+    chunk_words: int = CHUNK_WORDS,
+    overlap_words: int = OVERLAP_WORDS,
+    max_concurrency: int = 4,
+    temperature: float = 0,
+    collection_name: str = "LLMQuoterTest",
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = "llmquoter",
+) -> dict:
+    store = get_store(connection_string, database_name)
+    collection = store.collection(collection_name)
+    docs = _load_docs(store, collection, uuid, limit, None)
+    chain = get_chain(model_name, temperature)
+    rows = {"single": [], "chunked": []}
+    for doc in docs:
+        n_chunks = len(split_context(doc["context"], chunk_words, overlap_words))
+        single, single_s = _timed(lambda: chain.invoke({"question": doc["question"], "context": doc["context"]}).content)
+        chunked, chunked_s = _timed(lambda: invoke_chunked(chain, doc["question"], doc["context"], chunk_words, overlap_words, max_concurrency))
+        for mode, output, seconds in (("single", single, single_s), ("chunked", chunked, chunked_s)):
+            if output is not None:
+                rows[mode].append({"seconds": seconds, "quotes": len(parse_quotes(output)), "chunks": n_chunks, "words": len(doc["context"].split())})
+    report = {}
+    print(f"\n=== Inference latency {model_name} (chunk {chunk_words} words, overlap {overlap_words}, concurrency {max_concurrency}) ===")
+    print(f"{'Mode':<10} {'Docs':<6} {'Mean s':<10} {'p50 s':<10} {'p95 s':<10} {'Quotes':<8} {'Chunks':<8}")
+    print("-" * 66)
+    for mode, results in rows.items():
+        if not results:
+            continue
+        seconds = [r["seconds"] for r in results]
+        report[mode] = {
+            "count": len(results),
+            "mean": round(statistics.fmean(seconds), 4),
+            "p50": round(_percentile(seconds, 0.5), 4),
+            "p95": round(_percentile(seconds, 0.95), 4),
+            "quotes": round(statistics.fmean(r["quotes"] for r in results), 2),
+            "chunks": round(statistics.fmean(r["chunks"] for r in results), 2),
+        }
+        m = report[mode]
+        print(f"{mode:<10} {m['count']:<6} {m['mean']:<10.3f} {m['p50']:<10.3f} {m['p95']:<10.3f} {m['quotes']:<8.2f} {m['chunks']:<8.2f}")
+    if report.get("single") and report.get("chunked") and report["chunked"]["mean"]:
+        report["speedup"] = round(report["single"]["mean"] / report["chunked"]["mean"], 3)
+        print(f"Chunked speedup: {report['speedup']:.2f}x")
+    return report
@@ -0,0 +1,66 @@
+import atexit
+import os
+import threading
+
+from storage.base import DocumentStore
+
+DEFAULT_CONNECTION = os.getenv("LLMQUOTER_STORAGE", "mongodb://localhost:27017")
+DEFAULT_DATABASE = os.getenv("LLMQUOTER_DATABASE", "llmquoter")
+
+_stores: dict[tuple[str, str], DocumentStore] = {}
+_lock = threading.Lock()
+
+
+def _sqlite_path(connection_string: str) -> str:
+    path = connection_string[len("sqlite://"):]
+    if path.startswith("/"):
+        path = path[1:]
+    return path or ":memory:"
+
+
+def get_store(
+    connection_string: str = DEFAULT_CONNECTION,
+    database_name: str = DEFAULT_DATABASE,
+) -> DocumentStore:
+    key = (connection_string, database_name)
+    with _lock:
+        if key not in _stores:
+            if connection_string.startswith("sqlite://"):
+                from storage.sqlite import SQLiteStore
+                _stores[key] = SQLiteStore(_sqlite_path(connection_string), database_name)
+            else:
+                from storage.mongo import MongoStore
+                _stores[key] = MongoStore(connection_string, database_name)
+        return _stores[key]
+
+
+def close_stores() -> None:
+    with _lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
+
+
+atexit.register(close_stores)
+
+
+def __getattr__(name: str):
+    if name == "MongoStore":
+        from storage.mongo import MongoStore
+        return MongoStore
+    if name == "SQLiteStore":
+        from storage.sqlite import SQLiteStore
+        return SQLiteStore
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "DEFAULT_CONNECTION",
+    "DEFAULT_DATABASE",
+    "DocumentStore",
+    "MongoStore",
+    "SQLiteStore",
+    "get_store",
+    "close_stores",
+]
@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class DocumentStore(ABC):
+
+    @abstractmethod
+    def collection(self, name: str) -> Any:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    def __getitem__(self, name: str):
+        return self.collection(name)
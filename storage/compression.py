@@ -0,0 +1,199 @@
+import threading
+from datetime import datetime, timezone
+
+import bson
+import zstandard
+
+from storage.base import DocumentStore
+
+DICTIONARY_COLLECTION = "CompressionDictionaries"
+COMPRESSED_FIELDS = ("context",)
+DICTIONARY_SIZE = 64 * 1024
+COMPRESSION_LEVEL = 9
+TRAINING_SAMPLES = 2000
+
+_dictionaries: dict[int, zstandard.ZstdCompressionDict] = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def register_dictionary(data: bytes) -> int:
+    dictionary = zstandard.ZstdCompressionDict(data)
+    with _lock:
+        _dictionaries[dictionary.dict_id()] = dictionary
+    return dictionary.dict_id()
+
+
+def load_dictionaries(store: DocumentStore) -> list[int]:
+    return [
+        register_dictionary(doc["data"])
+        for doc in store.collection(DICTIONARY_COLLECTION).find({}, {"data": 1})
+        if doc.get("data")
+    ]
+
+
+def train_dictionary(
+    store: DocumentStore,
+    samples: list[str],
+    field: str = "context",
+    dict_size: int = DICTIONARY_SIZE,
+) -> int:
+    encoded = [s.encode("utf-8") for s in samples if s]
+    try:
+        dictionary = zstandard.train_dictionary(dict_size, encoded)
+    except zstandard.ZstdError as e:
+        print(f"Dictionary training failed ({e}); compressing without a dictionary")
+        return 0
+    dict_id = register_dictionary(dictionary.as_bytes())
+    store.collection(DICTIONARY_COLLECTION).update_one(
+        {"dict_id": dict_id},
+        {"$set": {
+            "dict_id": dict_id,
+            "field": field,
+            "data": dictionary.as_bytes(),
+            "samples": len(encoded),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }},
+        upsert=True,
+    )
+    return dict_id
+
+
+def latest_dictionary(store: DocumentStore, field: str = "context") -> int:
+    docs = store.collection(DICTIONARY_COLLECTION).find({"field": field}, {"dict_id": 1, "data": 1, "created_at": 1})
+    docs = sorted(docs, key=lambda d: d.get("created_at", ""))
+    for doc in docs:
+        register_dictionary(doc["data"])
+    return docs[-1]["dict_id"] if docs else 0
+
+
+def _compressor(dict_id: int, level: int) -> zstandard.ZstdCompressor:
+    cache = _local.__dict__.setdefault("compressors", {})
+    key = (dict_id, level)
+    if key not in cache:
+        dictionary = _dictionaries.get(dict_id) if dict_id else None
+        cache[key] = zstandard.ZstdCompressor(level=level, dict_data=dictionary, write_checksum=True)
+    return cache[key]
+
+
+def _decompressor(dict_id: int) -> zstandard.ZstdDecompressor:
+    cache = _local.__dict__.setdefault("decompressors", {})
+    if dict_id not in cache:
+        cache[dict_id] = zstandard.ZstdDecompressor(dict_data=_dictionaries[dict_id] if dict_id else None)
+    return cache[dict_id]
+
+
+def compress_text(text: str, dict_id: int = 0, level: int = COMPRESSION_LEVEL) -> bytes:
+    return _compressor(dict_id, level).compress(text.encode("utf-8"))
+
+
+def decompress_text(data: bytes, store: DocumentStore | None = None) -> str:
+    dict_id = zstandard.get_frame_parameters(data).dict_id
+    if dict_id and dict_id not in _dictionaries and store is not None:
+        load_dictionaries(store)
+    if dict_id and dict_id not in _dictionaries:
+        raise KeyError(f"Compression dictionary {dict_id} is not loaded")
+    return _decompressor(dict_id).decompress(data).decode("utf-8")
+
+
+def decode_field(value, store: DocumentStore | None = None):
+    if isinstance(value, (bytes, bytearray)):
+        return decompress_text(bytes(value), store)
+    return value
+
+
+class ContextCompressor:
+
+    def __init__(self, store: DocumentStore, field: str = "context", level: int = COMPRESSION_LEVEL):
+        self.store = store
+        self.field = field
+        self.level = level
+        self.dict_id: int | None = None
+
+    def prepare(self, samples: list[str]) -> int:
+        if self.dict_id is None:
+            self.dict_id = latest_dictionary(self.store, self.field)
+        if not self.dict_id:
+            self.dict_id = train_dictionary(self.store, samples[:TRAINING_SAMPLES], self.field)
+        return self.dict_id
+
+    def compress_docs(self, docs: list[dict]) -> list[dict]:
+        self.prepare([d.get(self.field) for d in docs if isinstance(d.get(self.field), str)])
+        for doc in docs:
+            if isinstance(doc.get(self.field), str) and doc[self.field]:
+                doc[self.field] = compress_text(doc[self.field], self.dict_id, self.level)
+        return docs
+
+
+class LazyDocument(dict):
+
+    def __init__(self, doc: dict, store: DocumentStore | None = None):
+        super().__init__(doc)
+        self._store = store
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if key in COMPRESSED_FIELDS and isinstance(value, (bytes, bytearray)):
+            value = decompress_text(bytes(value), self._store)
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __reduce__(self):
+        return dict, ({key: self[key] for key in self},)
+
+
+def lazy_documents(cursor, store: DocumentStore | None = None):
+    for doc in cursor:
+        yield LazyDocument(doc, store)
+
+
+def migrate_collection(
+    store: DocumentStore,
+    collection_name: str,
+    field: str = "context",
+    decompress: bool = False,
+    batch_size: int = 500,
+    level: int = COMPRESSION_LEVEL,
+) -> dict:
+    collection = store.collection(collection_name)
+    wanted = bytes if decompress else str
+    compressor = ContextCompressor(store, field, level)
+    if not decompress:
+        samples = []
+        for doc in collection.find({field: {"$exists": True}}, {field: 1}):
+            if isinstance(doc.get(field), str) and doc[field]:
+                samples.append(doc[field])
+                if len(samples) >= TRAINING_SAMPLES:
+                    break
+        compressor.prepare(samples)
+    stats = {"documents": 0, "field_before": 0, "field_after": 0, "doc_before": 0, "doc_after": 0}
+    batch = []
+
+    def _flush():
+        for _id, value in batch:
+            collection.update_one({"_id": _id}, {"$set": {field: value}})
+        batch.clear()
+
+    for doc in collection.find({}):
+        value = doc.get(field)
+        if not isinstance(value, wanted) or not value:
+            continue
+        new_value = decompress_text(value, store) if decompress else compress_text(value, compressor.dict_id, level)
+        before_size = len(bson.encode(doc))
+        stats["field_before"] += len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+        doc[field] = new_value
+        stats["doc_before"] += before_size
+        stats["doc_after"] += len(bson.encode(doc))
+        stats["field_after"] += len(new_value.encode("utf-8")) if isinstance(new_value, str) else len(new_value)
+        stats["documents"] += 1
+        batch.append((doc["_id"], new_value))
+        if len(batch) >= batch_size:
+            _flush()
+    _flush()
+    stats["dict_id"] = compressor.dict_id
+    stats["field_ratio"] = round(stats["field_before"] / stats["field_after"], 3) if stats["field_after"] else 0.0
+    stats["doc_ratio"] = round(stats["doc_before"] / stats["doc_after"], 3) if stats["doc_after"] else 0.0
+    return stats
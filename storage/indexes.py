@@ -0,0 +1,112 @@
+from pymongo.errors import OperationFailure
+
+from storage.base import DocumentStore
+
+
+def index_specs(collection_name: str = "LLMQuoterTest", hotpot_collection: str = "HotPotQAQuotes") -> dict[str, list[dict]]:
+    return {
+        collection_name: [
+            {"keys": [("uuid", 1)], "name": "uuid_1", "unique": True},
+            {
+                "keys": [("quotes", 1)],
+                "name": "quotes_with_inferences",
+                "partialFilterExpression": {"inferences": {"$exists": True}},
+            },
+            {"keys": [("scores.$**", 1)], "name": "scores_wildcard"},
+            {
+                "keys": [("uuid", 1)],
+                "name": "uuid_scored",
+                "partialFilterExpression": {"scores": {"$exists": True}},
+            },
+            {
+                "keys": [("uuid", 1)],
+                "name": "uuid_grounded",
+                "partialFilterExpression": {"grounding": {"$exists": True}},
+            },
+        ],
+        hotpot_collection: [
+            {"keys": [("hf_id", 1)], "name": "hf_id_1", "unique": True},
+            {"keys": [("split", 1)], "name": "split_1"},
+        ],
+    }
+
+
+def query_paths(store: DocumentStore, collection_name: str = "LLMQuoterTest", hotpot_collection: str = "HotPotQAQuotes") -> list[dict]:
+    sample = store.collection(collection_name).find_one(
+        {"scores": {"$exists": True}}, {"uuid": 1, "scores": 1}
+    ) or store.collection(collection_name).find_one({}, {"uuid": 1, "inferences": 1}) or {}
+    model_name = next(iter(sample.get("scores") or sample.get("inferences") or {}), "model")
+    uuid_val = sample.get("uuid", "")
+    hotpot = store.collection(hotpot_collection).find_one({}, {"hf_id": 1, "split": 1}) or {}
+    pending = {"quotes": {"$exists": True, "$ne": ""}, "inferences": {"$exists": True}}
+    return [
+        {"path": "evaluate / worker / batch pending", "collection": collection_name, "filter": pending},
+        {"path": "score lookup by uuid", "collection": collection_name, "filter": {"uuid": uuid_val}},
+        {"path": "scored by model", "collection": collection_name, "filter": {f"scores.{model_name}": {"$exists": True}}},
+        {"path": "averages / summary rebuild", "collection": collection_name, "filter": {"scores": {"$exists": True}}, "sort": [("uuid", 1)]},
+        {"path": "snapshot export", "collection": collection_name, "filter": {"scores": {"$exists": True}}, "sort": [("uuid", 1)]},
+        {
+            "path": "progressive sampling",
+            "collection": collection_name,
+            "filter": {"quotes": {"$exists": True, "$ne": ""}, f"inferences.{model_name}": {"$exists": True}},
+        },
+        {
+            "path": "grounding pending",
+            "collection": collection_name,
+            "filter": {"context": {"$exists": True, "$ne": ""}, "inferences": {"$exists": True}},
+        },
+        {"path": "grounding averages", "collection": collection_name, "filter": {"grounding": {"$exists": True}}, "sort": [("uuid", 1)]},
+        {"path": "HotPotQA find_by_hf_id", "collection": hotpot_collection, "filter": {"hf_id": hotpot.get("hf_id", "")}},
+        {"path": "HotPotQA find_all(split)", "collection": hotpot_collection, "filter": {"split": hotpot.get("split", "train")}},
+    ]
+
+
+def ensure_indexes(store: DocumentStore, specs: dict[str, list[dict]]) -> list[dict]:
+    results = []
+    for collection_name, indexes in specs.items():
+        collection = store.collection(collection_name)
+        for spec in indexes:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                collection.create_index(spec["keys"], **options)
+                status = "ok" if spec["name"] in collection.index_information() else "unsupported"
+            except OperationFailure as e:
+                status = f"failed: {e.details.get('errmsg') if e.details else e}"
+            results.append({"collection": collection_name, "name": spec["name"], "status": status})
+    return results
+
+
+def _plan_stages(plan: dict) -> list[dict]:
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node)
+        pending.extend(node.get(key) for key in ("inputStage", "queryPlan", "outerStage", "innerStage") if key in node)
+        pending.extend(node.get("inputStages") or [])
+    return stages
+
+
+def explain_path(store: DocumentStore, path: dict) -> dict:
+    cursor = store.collection(path["collection"]).find(path["filter"])
+    if path.get("sort"):
+        cursor = cursor.sort(path["sort"])
+    explain = cursor.explain()
+    stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+    names = {s["stage"] for s in stages}
+    stats = explain.get("executionStats", {})
+    return {
+        "path": path["path"],
+        "collection": path["collection"],
+        "plan": "COLLSCAN" if "COLLSCAN" in names else "IXSCAN" if names & {"IXSCAN", "EXPRESS_IXSCAN"} else "/".join(sorted(names)) or "?",
+        "index": ", ".join(s["indexName"] for s in stages if s.get("indexName")),
+        "examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+    }
+
+
+def explain_paths(store: DocumentStore, paths: list[dict]) -> list[dict]:
+    return [explain_path(store, path) for path in paths]
@@ -0,0 +1,33 @@
+import threading
+
+from pymongo import MongoClient
+from pymongo.collection import Collection
+
+from storage.base import DocumentStore
+
+_clients: dict[str, MongoClient] = {}
+_lock = threading.Lock()
+
+
+def shared_client(connection_string: str) -> MongoClient:
+    with _lock:
+        if connection_string not in _clients:
+            _clients[connection_string] = MongoClient(connection_string)
+        return _clients[connection_string]
+
+
+class MongoStore(DocumentStore):
+
+    def __init__(self, connection_string: str, database_name: str):
+        self.client = shared_client(connection_string)
+        self.db = self.client[database_name]
+
+    def collection(self, name: str) -> Collection:
+        return self.db[name]
+
+    def close(self) -> None:
+        with _lock:
+            for key, client in list(_clients.items()):
+                if client is self.client:
+                    del _clients[key]
+        self.client.close()
@@ -0,0 +1,538 @@
+import base64
+import contextlib
+import itertools
+import json
+import operator
+import re
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterator
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from storage.base import DocumentStore
+
+MISSING = object()
+SIMPLE_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+INDEX_PLAN = re.compile(r"USING (?:COVERING )?INDEX \"?([^\s\"]+)")
+PAGE_SIZE = 500
+COMPARISONS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+_connections: dict[str, tuple[sqlite3.Connection, threading.RLock]] = {}
+_connections_lock = threading.Lock()
+
+
+@dataclass
+class InsertOneResult:
+    inserted_id: Any
+
+
+@dataclass
+class InsertManyResult:
+    inserted_ids: list
+
+
+@dataclass
+class UpdateResult:
+    matched_count: int
+    modified_count: int
+    upserted_id: Any = None
+
+
+@dataclass
+class DeleteResult:
+    deleted_count: int
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {"$binary": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not storable")
+
+
+def _decode(obj: dict):
+    if len(obj) == 1:
+        if "$binary" in obj:
+            return base64.b64decode(obj["$binary"])
+        if "$date" in obj:
+            return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def dumps(value) -> str:
+    return json.dumps(value, default=_encode, ensure_ascii=False)
+
+
+def loads(text: str):
+    return json.loads(text, object_hook=_decode)
+
+
+def get_path(doc: dict, path: str):
+    node = doc
+    for part in path.split("."):
+        if isinstance(node, dict) and part in node:
+            node = node[part]
+        elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+            node = node[int(part)]
+        else:
+            return MISSING
+    return node
+
+
+def set_path(doc: dict, path: str, value) -> None:
+    parts = path.split(".")
+    node = doc
+    for part in parts[:-1]:
+        if not isinstance(node.get(part), dict):
+            node[part] = {}
+        node = node[part]
+    node[parts[-1]] = value
+
+
+def unset_path(doc: dict, path: str) -> None:
+    parts = path.split(".")
+    node = get_path(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+    if isinstance(node, dict):
+        node.pop(parts[-1], None)
+
+
+def _compare(op: str, actual, expected) -> bool:
+    if op == "$exists":
+        return (actual is not MISSING) == bool(expected)
+    if op == "$eq":
+        if expected is None:
+            return actual is MISSING or actual is None
+        return actual is not MISSING and actual == expected
+    if op == "$ne":
+        return not _compare("$eq", actual, expected)
+    if op == "$in":
+        return any(_compare("$eq", actual, v) for v in expected)
+    if op == "$nin":
+        return not _compare("$in", actual, expected)
+    if op in COMPARISONS:
+        if actual is MISSING or actual is None:
+            return False
+        try:
+            return COMPARISONS[op](actual, expected)
+        except TypeError:
+            return False
+    raise OperationFailure(f"Unsupported query operator {op}")
+
+
+def _is_operator_dict(value) -> bool:
+    return isinstance(value, dict) and bool(value) and all(k.startswith("$") for k in value)
+
+
+def matches(doc: dict, filter: dict | None) -> bool:
+    for key, cond in (filter or {}).items():
+        if key == "$and":
+            if not all(matches(doc, f) for f in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, f) for f in cond):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, f) for f in cond):
+                return False
+        elif _is_operator_dict(cond):
+            actual = get_path(doc, key)
+            if not all(_compare(op, actual, v) for op, v in cond.items()):
+                return False
+        elif not _compare("$eq", get_path(doc, key), cond):
+            return False
+    return True
+
+
+def project(doc: dict, projection) -> dict:
+    if not projection:
+        return doc
+    if isinstance(projection, (list, tuple)):
+        projection = {f: 1 for f in projection}
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if fields and all(fields.values()):
+        out = {}
+        for path in fields:
+            value = get_path(doc, path)
+            if value is not MISSING:
+                set_path(out, path, value)
+    else:
+        out = dict(doc)
+        for path in fields:
+            unset_path(out, path)
+    if projection.get("_id", 1) and "_id" in doc:
+        out["_id"] = doc["_id"]
+    else:
+        out.pop("_id", None)
+    return out
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False) -> dict:
+    if not any(k.startswith("$") for k in update):
+        return {"_id": doc.get("_id"), **update}
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            for path, value in fields.items():
+                set_path(doc, path, value)
+        elif op == "$unset":
+            for path in fields:
+                unset_path(doc, path)
+        elif op == "$inc":
+            for path, value in fields.items():
+                current = get_path(doc, path)
+                set_path(doc, path, (0 if current is MISSING else current) + value)
+        elif op != "$setOnInsert":
+            raise OperationFailure(f"Unsupported update operator {op}")
+    return doc
+
+
+def _upsert_base(filter: dict) -> dict:
+    doc = {}
+    for key, cond in (filter or {}).items():
+        if key.startswith("$"):
+            continue
+        if _is_operator_dict(cond):
+            if "$eq" in cond:
+                set_path(doc, key, cond["$eq"])
+        else:
+            set_path(doc, key, cond)
+    return doc
+
+
+def _json_path(path: str) -> str:
+    return "$." + path
+
+
+class Cursor:
+
+    def __init__(self, collection: "SQLiteCollection", filter: dict | None, projection):
+        self._collection = collection
+        self._filter = filter or {}
+        self._projection = projection
+        self._sort: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: int = 1) -> "Cursor":
+        self._sort = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def skip(self, n: int) -> "Cursor":
+        self._skip = n
+        return self
+
+    def limit(self, n: int) -> "Cursor":
+        self._limit = n
+        return self
+
+    def batch_size(self, n: int) -> "Cursor":
+        return self
+
+    def explain(self) -> dict:
+        return self._collection.explain(self._filter, self._sort)
+
+    def __iter__(self) -> Iterator[dict]:
+        if self._sort and all(SIMPLE_PATH.match(key) for key, _ in self._sort):
+            docs = self._collection._sorted_select(self._filter, self._sort)
+        elif self._sort:
+            docs = list(self._collection._iter_select(self._filter))
+            for key, direction in reversed(self._sort):
+                docs.sort(key=lambda d: _sort_key(get_path(d, key)), reverse=direction < 0)
+        else:
+            docs = self._collection._iter_select(self._filter)
+        docs = itertools.islice(docs, self._skip, self._skip + self._limit if self._limit else None)
+        for doc in docs:
+            yield project(doc, self._projection)
+
+
+def _sort_key(value):
+    if value is MISSING or value is None:
+        return (0, "")
+    if isinstance(value, (int, float)):
+        return (1, value)
+    return (2, str(value))
+
+
+class SQLiteCollection:
+
+    def __init__(self, store: "SQLiteStore", name: str):
+        self.store = store
+        self.name = name
+        self.table = f"{store.database_name}.{name}"
+        with self.store.lock:
+            self.store.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" (_id TEXT PRIMARY KEY, doc TEXT NOT NULL)'
+            )
+
+    def _where(self, filter: dict) -> tuple[str, list]:
+        clauses, params = [], []
+        for key, cond in filter.items():
+            if key.startswith("$") or not SIMPLE_PATH.match(key):
+                continue
+            if _is_operator_dict(cond) and cond.get("$exists") is True and "." not in key:
+                clauses.append(f"json_type(doc, '{_json_path(key)}') IS NOT NULL")
+                continue
+            value = cond["$eq"] if _is_operator_dict(cond) and list(cond) == ["$eq"] else cond
+            if isinstance(value, bool) or not isinstance(value, (str, int)):
+                continue
+            if key == "_id":
+                clauses.append("_id = ?")
+                params.append(dumps(value))
+            else:
+                clauses.append(f"json_extract(doc, '{_json_path(key)}') = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _iter_select(self, filter: dict) -> Iterator[dict]:
+        where, params = self._where(filter or {})
+        where = f"{where} AND rowid > ?" if where else " WHERE rowid > ?"
+        sql = f'SELECT rowid, doc FROM "{self.table}"{where} ORDER BY rowid LIMIT {PAGE_SIZE}'
+        last = 0
+        while True:
+            with self.store.lock:
+                rows = self.store.conn.execute(sql, [*params, last]).fetchall()
+            for rowid, text in rows:
+                doc = loads(text)
+                if matches(doc, filter):
+                    yield doc
+            if len(rows) < PAGE_SIZE:
+                return
+            last = rows[-1][0]
+
+    def _order_by(self, sort: list[tuple[str, int]] | None) -> str:
+        terms = [
+            f"{'_id' if key == '_id' else f'json_extract(doc, {_json_path(key)!r})'}{' DESC' if direction < 0 else ''}"
+            for key, direction in sort or []
+        ]
+        return " ORDER BY " + ", ".join([*terms, "rowid"])
+
+    def _sorted_select(self, filter: dict, sort: list[tuple[str, int]]) -> list[dict]:
+        where, params = self._where(filter or {})
+        with self.store.lock:
+            rows = self.store.conn.execute(f'SELECT doc FROM "{self.table}"{where}{self._order_by(sort)}', params).fetchall()
+        return [doc for doc in map(loads, (text for (text,) in rows)) if matches(doc, filter)]
+
+    def _select(self, filter: dict, limit: int = 0) -> list[dict]:
+        return list(itertools.islice(self._iter_select(filter), limit or None))
+
+    def _write(self, doc: dict, replace: bool) -> None:
+        try:
+            if replace:
+                self.store.conn.execute(
+                    f'UPDATE "{self.table}" SET doc = ? WHERE _id = ?', (dumps(doc), dumps(doc["_id"]))
+                )
+            else:
+                self.store.conn.execute(
+                    f'INSERT INTO "{self.table}" (_id, doc) VALUES (?, ?)', (dumps(doc["_id"]), dumps(doc))
+                )
+        except sqlite3.IntegrityError as e:
+            raise DuplicateKeyError(str(e)) from e
+
+    def find(self, filter: dict | None = None, projection=None) -> Cursor:
+        return Cursor(self, filter, projection)
+
+    def find_one(self, filter: dict | None = None, projection=None) -> dict | None:
+        doc = next(self._iter_select(filter or {}), None)
+        return project(doc, projection) if doc is not None else None
+
+    def count_documents(self, filter: dict) -> int:
+        return sum(1 for _ in self._iter_select(filter))
+
+    def distinct(self, key: str, filter: dict | None = None) -> list:
+        values = []
+        for doc in self._iter_select(filter or {}):
+            value = get_path(doc, key)
+            if value is not MISSING and value not in values:
+                values.append(value)
+        return values
+
+    def insert_one(self, doc: dict) -> InsertOneResult:
+        doc.setdefault("_id", uuid.uuid4().hex)
+        with self.store.lock:
+            self._write(doc, replace=False)
+        return InsertOneResult(doc["_id"])
+
+    def insert_many(self, docs: list[dict], ordered: bool = True) -> InsertManyResult:
+        with self.store.transaction():
+            for doc in docs:
+                doc.setdefault("_id", uuid.uuid4().hex)
+                self._write(doc, replace=False)
+        return InsertManyResult([doc["_id"] for doc in docs])
+
+    def _update(self, filter: dict, update: dict, upsert: bool, many: bool) -> tuple[UpdateResult, dict | None, dict | None]:
+        with self.store.transaction():
+            docs = self._select(filter, limit=0 if many else 1)
+            if not docs:
+                if not upsert:
+                    return UpdateResult(0, 0), None, None
+                doc = apply_update(_upsert_base(filter), update, inserting=True)
+                doc["_id"] = doc.get("_id") or filter.get("_id") or uuid.uuid4().hex
+                self._write(doc, replace=False)
+                return UpdateResult(0, 0, doc["_id"]), None, doc
+            modified = 0
+            before = after = None
+            for doc in docs:
+                before = loads(dumps(doc))
+                after = apply_update(doc, update)
+                if after != before:
+                    self._write(after, replace=True)
+                    modified += 1
+            return UpdateResult(len(docs), modified), before, after
+
+    def update_one(self, filter: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return self._update(filter, update, upsert, many=False)[0]
+
+    def update_many(self, filter: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return self._update(filter, update, upsert, many=True)[0]
+
+    def replace_one(self, filter: dict, replacement: dict, upsert: bool = False) -> UpdateResult:
+        replacement = {k: v for k, v in replacement.items() if k != "_id"}
+        return self._update(filter, replacement, upsert, many=False)[0]
+
+    def find_one_and_update(
+        self,
+        filter: dict,
+        update: dict,
+        projection=None,
+        return_document: bool = ReturnDocument.BEFORE,
+        upsert: bool = False,
+    ) -> dict | None:
+        _, before, after = self._update(filter, update, upsert, many=False)
+        doc = after if return_document == ReturnDocument.AFTER else before
+        return project(doc, projection) if doc is not None else None
+
+    def delete_many(self, filter: dict) -> DeleteResult:
+        with self.store.transaction():
+            docs = self._select(filter)
+            self.store.conn.executemany(
+                f'DELETE FROM "{self.table}" WHERE _id = ?', [(dumps(d["_id"]),) for d in docs]
+            )
+        return DeleteResult(len(docs))
+
+    def create_index(self, keys, unique: bool = False, name: str | None = None, **kwargs) -> str:
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        fields = [k for k, _ in keys]
+        name = name or "_".join(f"{k}_{d}" for k, d in keys)
+        if any(not SIMPLE_PATH.match(f) for f in fields):
+            return name
+        conditions = []
+        for key, cond in (kwargs.get("partialFilterExpression") or {}).items():
+            if cond != {"$exists": True} or not SIMPLE_PATH.match(key):
+                return name
+            conditions.append(f"json_type(doc, '{_json_path(key)}') IS NOT NULL")
+        expressions = ", ".join(f"json_extract(doc, '{_json_path(f)}')" for f in fields)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.store.lock:
+            self.store.conn.execute(
+                f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{self.table}.{name}" '
+                f'ON "{self.table}" ({expressions}){where}'
+            )
+        return name
+
+    def index_information(self) -> dict:
+        prefix = f"{self.table}."
+        with self.store.lock:
+            rows = self.store.conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (self.table,)
+            ).fetchall()
+        return {name[len(prefix):] if name.startswith(prefix) else name: {"sql": sql} for name, sql in rows}
+
+    def explain(self, filter: dict | None = None, sort: list[tuple[str, int]] | None = None) -> dict:
+        filter = filter or {}
+        where, params = self._where(filter)
+        sql = f'SELECT doc FROM "{self.table}"{where}{self._order_by(sort)}'
+        examined = returned = 0
+        with self.store.lock:
+            plan = [row[3] for row in self.store.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            for (text,) in self.store.conn.execute(sql, params):
+                examined += 1
+                returned += matches(loads(text), filter)
+        index = next((m for m in (INDEX_PLAN.search(d) for d in plan) if m), None)
+        if index:
+            name = index.group(1)
+            stage = {"stage": "IXSCAN", "indexName": name[len(self.table) + 1:] if name.startswith(self.table) else name}
+        else:
+            stage = {"stage": "COLLSCAN"}
+        return {
+            "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": stage}, "sqlitePlan": plan},
+            "executionStats": {"totalDocsExamined": examined, "nReturned": returned},
+        }
+
+    def drop(self) -> None:
+        with self.store.lock:
+            self.store.conn.execute(f'DROP TABLE IF EXISTS "{self.table}"')
+            self.store.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table}" (_id TEXT PRIMARY KEY, doc TEXT NOT NULL)'
+            )
+
+    def rename(self, new_name: str, dropTarget: bool = False) -> None:
+        target = f"{self.store.database_name}.{new_name}"
+        with self.store.transaction():
+            if dropTarget:
+                self.store.conn.execute(f'DROP TABLE IF EXISTS "{target}"')
+            self.store.conn.execute(f'ALTER TABLE "{self.table}" RENAME TO "{target}"')
+        self.store.collections.pop(self.name, None)
+        self.store.collections.pop(new_name, None)
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("Change streams are not supported by the SQLite store")
+
+
+def _shared_connection(path: str) -> tuple[sqlite3.Connection, threading.RLock]:
+    with _connections_lock:
+        if path not in _connections:
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            if path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            _connections[path] = (conn, threading.RLock())
+        return _connections[path]
+
+
+class SQLiteStore(DocumentStore):
+
+    def __init__(self, path: str, database_name: str):
+        self.path = path
+        self.database_name = database_name
+        self.conn, self.lock = _shared_connection(path)
+        self.collections: dict[str, SQLiteCollection] = {}
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self.lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+    def collection(self, name: str) -> SQLiteCollection:
+        if name not in self.collections:
+            self.collections[name] = SQLiteCollection(self, name)
+        return self.collections[name]
+
+    def close(self) -> None:
+        with _connections_lock:
+            if _connections.get(self.path, (None,))[0] is self.conn:
+                del _connections[self.path]
+        self.conn.close()
@@ -0,0 +1,112 @@
+import pytest
+from pymongo import ReturnDocument
+
+import storage.sqlite as sqlite_store
+from storage.sqlite import SQLiteStore
+
+
+@pytest.fixture
+def collection(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.sqlite"), "llmquoter")
+    collection = store.collection("LLMQuoterTest")
+    collection.insert_many([
+        {"_id": "a", "uuid": "u1", "quotes": "q1", "inferences": {"m1": "x"}, "scores": {"m1": {"f1": 0.5}}},
+        {"_id": "b", "uuid": "u2", "quotes": "", "inferences": {"m2": "y"}},
+        {"_id": "c", "uuid": "u3", "quotes": "q3", "level": None},
+        {"_id": "d", "uuid": "u4", "quotes": "q4", "inferences": {"m1": "z"}},
+    ])
+    return collection
+
+
+def ids(cursor) -> list[str]:
+    return [doc["_id"] for doc in cursor]
+
+
+def test_exists(collection):
+    assert ids(collection.find({"inferences": {"$exists": True}})) == ["a", "b", "d"]
+    assert ids(collection.find({"inferences": {"$exists": False}})) == ["c"]
+    assert ids(collection.find({"inferences.m1": {"$exists": True}})) == ["a", "d"]
+    assert ids(collection.find({"level": {"$exists": True}})) == ["c"]
+    assert ids(collection.find({"scores.m1.f1": {"$exists": True}})) == ["a"]
+
+
+def test_ne(collection):
+    assert ids(collection.find({"quotes": {"$exists": True, "$ne": ""}})) == ["a", "c", "d"]
+    assert ids(collection.find({"level": {"$ne": None}})) == []
+    assert ids(collection.find({"level": {"$ne": "easy"}})) == ["a", "b", "c", "d"]
+    assert ids(collection.find({"uuid": {"$ne": "u1"}, "inferences": {"$exists": True}})) == ["b", "d"]
+
+
+def test_in(collection):
+    assert ids(collection.find({"uuid": {"$in": ["u2", "u4", "missing"]}})) == ["b", "d"]
+    assert ids(collection.find({"level": {"$in": [None]}})) == ["a", "b", "c", "d"]
+    assert ids(collection.find({"uuid": {"$nin": ["u1", "u2"]}})) == ["c", "d"]
+
+
+def test_inc_upsert_creates_document_from_filter(collection):
+    result = collection.update_one({"model": "m1"}, {"$inc": {"count": 1, "sums.f1": 0.5}}, upsert=True)
+    assert result.upserted_id is not None
+    collection.update_one({"model": "m1"}, {"$inc": {"count": 1, "sums.f1": 0.25}}, upsert=True)
+    doc = collection.find_one({"model": "m1"}, {"_id": 0})
+    assert doc == {"model": "m1", "count": 2, "sums": {"f1": 0.75}}
+
+
+def test_inc_upsert_with_operator_filter_does_not_copy_operators(collection):
+    collection.update_one({"model": "m2", "count": {"$exists": False}}, {"$inc": {"count": 1}}, upsert=True)
+    assert collection.find_one({"model": "m2"}, {"_id": 0}) == {"model": "m2", "count": 1}
+
+
+def test_find_one_and_update_before_and_after(collection):
+    before = collection.find_one_and_update(
+        {"uuid": "u4"}, {"$set": {"scores.m1": {"f1": 1.0}}}, {"scores": 1, "_id": 0}
+    )
+    assert before == {}
+    after = collection.find_one_and_update(
+        {"uuid": "u4"},
+        {"$set": {"scores.m1.f1": 0.75}},
+        {"scores": 1, "_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    assert after == {"scores": {"m1": {"f1": 0.75}}}
+    assert collection.find_one_and_update({"uuid": "missing"}, {"$set": {"x": 1}}) is None
+
+
+def test_find_one_and_update_upsert_after(collection):
+    doc = collection.find_one_and_update(
+        {"uuid": "u9"}, {"$set": {"quotes": "q9"}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    assert doc["uuid"] == "u9" and doc["quotes"] == "q9" and doc["_id"]
+
+
+def test_projection(collection):
+    assert collection.find_one({"_id": "a"}, {"uuid": 1}) == {"_id": "a", "uuid": "u1"}
+    assert collection.find_one({"_id": "a"}, {"uuid": 1, "_id": 0}) == {"uuid": "u1"}
+    assert collection.find_one({"_id": "a"}, {"scores.m1.f1": 1, "_id": 0}) == {"scores": {"m1": {"f1": 0.5}}}
+    assert collection.find_one({"_id": "a"}, {"inferences.m1": 1, "inferences.m9": 1, "_id": 0}) == {
+        "inferences": {"m1": "x"}
+    }
+    excluded = collection.find_one({"_id": "a"}, {"inferences": 0, "scores": 0})
+    assert excluded == {"_id": "a", "uuid": "u1", "quotes": "q1"}
+
+
+def test_cursor_streams_in_pages_and_survives_updates(collection, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "PAGE_SIZE", 2)
+    collection.insert_many([{"_id": f"p{i}", "uuid": f"p{i}", "n": i} for i in range(5)])
+    seen = []
+    for doc in collection.find({"n": {"$exists": True}}):
+        seen.append(doc["_id"])
+        collection.update_one({"_id": doc["_id"]}, {"$set": {"n": doc["n"] + 100}})
+    assert seen == [f"p{i}" for i in range(5)]
+    assert [d["n"] for d in collection.find({"n": {"$exists": True}})] == [100, 101, 102, 103, 104]
+    assert ids(collection.find({"n": {"$exists": True}}).skip(1).limit(2)) == ["p1", "p2"]
+    assert ids(collection.find({"n": {"$exists": True}}).sort("n", -1).limit(2)) == ["p4", "p3"]
+
+
+def test_sort_is_pushed_into_sql_and_uses_partial_index(collection):
+    collection.insert_many([{"_id": "e", "quotes": "q5", "scores": {"m1": {"f1": 1.0}}}, {"_id": "f", "uuid": 3}])
+    assert ids(collection.find({}).sort("uuid", 1)) == ["e", "f", "a", "b", "c", "d"]
+    assert ids(collection.find({"quotes": {"$exists": True}}).sort([("uuid", -1)]).limit(2)) == ["d", "c"]
+    collection.create_index([("uuid", 1)], name="uuid_scored", partialFilterExpression={"scores": {"$exists": True}})
+    cursor = collection.find({"scores": {"$exists": True}}).sort("uuid", 1)
+    assert ids(cursor) == ["e", "a"]
+    assert cursor.explain()["queryPlanner"]["winningPlan"]["inputStage"]["indexName"] == "uuid_scored"
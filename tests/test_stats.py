@@ -0,0 +1,56 @@
+import numpy as np
+
+from core.stats import bootstrap_ci, bootstrap_compare, paired_comparison
+
+
+def test_zero_overlap_returns_nan():
+    values = np.full((40, 2), np.nan)
+    values[:20, 0] = 0.9
+    values[20:, 1] = 0.1
+    ci, paired = bootstrap_compare(values, [(0, 1)], resamples=200)
+    assert paired["count"][0] == 0
+    for key in ("diff", "low", "high", "p_bootstrap", "p_permutation"):
+        assert np.isnan(paired[key][0]), key
+    assert np.allclose(ci["mean"], [0.9, 0.1])
+    assert list(ci["count"]) == [20, 20]
+
+
+def test_identical_models_are_not_significant():
+    rng = np.random.default_rng(1)
+    scores = rng.uniform(0, 1, 100)
+    paired = paired_comparison(np.column_stack([scores, scores]), [(0, 1)], resamples=500)
+    assert paired["diff"][0] == 0
+    assert paired["low"][0] == paired["high"][0] == 0
+    assert paired["p_bootstrap"][0] == 1.0
+    assert paired["p_permutation"][0] == 1.0
+
+
+def test_known_mean_shift_is_detected():
+    rng = np.random.default_rng(2)
+    base = rng.uniform(0.2, 0.8, 200)
+    shifted = base + 0.1 + rng.normal(0, 0.02, 200)
+    paired = paired_comparison(np.column_stack([shifted, base]), [(0, 1)], resamples=1000)
+    assert abs(paired["diff"][0] - 0.1) < 0.01
+    assert paired["low"][0] < 0.1 < paired["high"][0]
+    assert paired["p_bootstrap"][0] < 0.01
+    assert paired["p_permutation"][0] < 0.01
+    assert paired["count"][0] == 200
+
+
+def test_small_overlap_ignores_resamples_without_common_rows():
+    values = np.full((200, 2), np.nan)
+    values[:, 0] = 0.5
+    values[0, 1] = 0.4
+    values[1, 1] = 0.8
+    paired = paired_comparison(values, [(0, 1)], resamples=4000)
+    assert paired["count"][0] == 2
+    assert np.isclose(paired["diff"][0], -0.1)
+    assert 0.51 < paired["p_bootstrap"][0] < 0.58
+
+
+def test_ci_covers_the_mean_and_skips_missing():
+    values = np.array([[0.2], [0.4], [np.nan], [0.6], [0.8]])
+    ci = bootstrap_ci(values, resamples=500)
+    assert np.isclose(ci["mean"][0], 0.5)
+    assert ci["count"][0] == 4
+    assert ci["low"][0] <= 0.5 <= ci["high"][0]